@@ -0,0 +1,248 @@
+"""Micro-benchmarks for the catalog pipeline.
+
+Usage (from backend/):
+    python benchmarks.py save_packs [--sizes 1000 10000 100000]
+    python benchmarks.py parser [--corpus fixtures/channel_messages.jsonl] [--rounds 50]
+    python benchmarks.py scrape [--dump fixtures/channel_messages.jsonl] [--mode full|today|verify]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import tempfile
+import time
+
+from database import Database
+from scraper import DLC_KEYWORDS, KNOWN_DLC_TITLES, PRICE_MULTIPLIER, GenericPack, NintendoScraper
+from sources import JsonlMessageSource
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'channel_messages.jsonl')
+
+
+def _synthetic_packs(count, seed=0):
+    """Packs shaped like GenericPack.to_dict() output."""
+    rng = random.Random(seed)
+    titles = ["Mario Kart 8 Deluxe", "Zelda Tears of the Kingdom", "Pokémon Escarlata", "Animal Crossing",
+              "Super Smash Bros Ultimate", "Splatoon 3", "Kirby Forgotten Land", "Metroid Dread",
+              "Mario Kart 8 Deluxe Booster Course Pass Only DLC", "Happy Home Paradise"]
+    packs = []
+    for i in range(count):
+        games = [{"name": rng.choice(titles), "is_dlc": rng.random() < 0.2, "is_mixed": False}
+                 for _ in range(rng.randint(1, 5))]
+        price_usd = rng.randint(5, 60)
+        packs.append({
+            "id": str(100000 + i),
+            "tg_msg_id": 1000 + i,
+            "raw_text": "ID : %d\n%s\n%d$" % (100000 + i, "\n".join(g["name"] for g in games), price_usd),
+            "games_json": games,
+            "price_usd": price_usd,
+            "price_local": price_usd * 3000,
+            "cover_url": None,
+        })
+    return packs
+
+
+def save_packs_row_by_row(db, packs_list, is_scrape_today=False):
+    """The save_packs loop before the bulk path: one SELECT plus one write per pack."""
+    added_count = 0
+    written_ids = []
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        for pack in packs_list:
+            cursor.execute('SELECT id, is_manually_deleted FROM packs WHERE id = ?', (pack['id'],))
+            existing = cursor.fetchone()
+            if existing and existing['is_manually_deleted'] == 1:
+                continue
+
+            games_json_str = json.dumps(pack.get('games_json', []))
+            if existing:
+                if is_scrape_today:
+                    continue
+                cursor.execute('''
+                    UPDATE packs SET
+                        tg_msg_id=?, raw_text=?, games_json=?, price_usd=?, price_local=?,
+                        cover_url=COALESCE(?, cover_url)
+                    WHERE id=?
+                ''', (
+                    pack.get('tg_msg_id', 0), pack['raw_text'], games_json_str,
+                    pack['price_usd'], pack['price_local'], pack.get('cover_url'),
+                    pack['id']
+                ))
+                db._write_pack_games(cursor, pack['id'], pack.get('games_json', []))
+                written_ids.append(pack['id'])
+            else:
+                cursor.execute('''
+                    INSERT INTO packs (id, tg_msg_id, raw_text, games_json, price_usd, price_local, cover_url, is_new)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    pack['id'], pack.get('tg_msg_id', 0), pack['raw_text'], games_json_str,
+                    pack['price_usd'], pack['price_local'], pack.get('cover_url'),
+                    1 if is_scrape_today else 0
+                ))
+                db._write_pack_games(cursor, pack['id'], pack.get('games_json', []))
+                written_ids.append(pack['id'])
+                added_count += 1
+        conn.commit()
+    db._bump_packs_generation(written_ids)
+    return added_count
+
+
+def bench_save_packs(sizes):
+    print(f"{'packs':>8} {'scenario':<14} {'row-by-row':>12} {'bulk':>12} {'speedup':>8}")
+    for size in sizes:
+        packs = _synthetic_packs(size)
+        # Full scrape into an empty catalog (all inserts), then again over it (all updates)
+        for scenario, prefill in (("insert", False), ("update", True)):
+            timings = []
+            for save in (save_packs_row_by_row, lambda db, p, t: db.save_packs(p, t)):
+                with tempfile.TemporaryDirectory() as tmp:
+                    db = Database(os.path.join(tmp, 'bench.db'))
+                    if prefill:
+                        db.save_packs(packs)
+                    started = time.perf_counter()
+                    save(db, packs, False)
+                    timings.append(time.perf_counter() - started)
+                    db.get_connection().close()
+            legacy, bulk = timings
+            print(f"{size:>8} {scenario:<14} {legacy:>11.3f}s {bulk:>11.3f}s {legacy / bulk:>7.1f}x")
+
+
+class LegacyGenericPack(GenericPack):
+    """GenericPack with the _parse loop before the compiled parser tables."""
+
+    def _parse(self):
+        lines = self.raw_text.split('\n')
+        id_found = False
+        price_found = False
+
+        for line in lines:
+            clean_line = line.strip()
+            if not clean_line:
+                continue
+
+            id_match = re.search(r"ID\s*:\s*(\d+)", clean_line, re.IGNORECASE)
+            if id_match:
+                self.id = id_match.group(1)
+                id_found = True
+                continue
+
+            price_match = re.search(r"(\d+(?:\.\d+)?)\s*\$|\$\s*(\d+(?:\.\d+)?)", clean_line)
+            if price_match:
+                price_str = price_match.group(1) or price_match.group(2)
+                self.original_price = int(float(price_str))
+                self.final_price = self.original_price * PRICE_MULTIPLIER
+                price_found = True
+                continue
+
+            if id_found and not price_found:
+                if "NINTENDO SWITCH ACCOUNT" in clean_line: continue
+                if "For buy:" in clean_line: continue
+
+                lower_line = clean_line.lower()
+                is_dlc_trigger = any(kw in lower_line for kw in DLC_KEYWORDS) or any(title in lower_line for title in KNOWN_DLC_TITLES)
+                is_mixed = "+" in lower_line and is_dlc_trigger
+
+                is_dlc = is_dlc_trigger and not is_mixed
+
+                translated_name = clean_line
+                if "only dlc" in lower_line:
+                    translated_name = re.sub(r"(?i)only dlc", "Solo DLC", translated_name)
+                elif "upgrade pack" in lower_line:
+                    translated_name = re.sub(r"(?i)upgrade pack", "- Mejora", translated_name)
+                elif "expansion pass" in lower_line:
+                    translated_name = re.sub(r"(?i)expansion pass", "Pase de Expansión", translated_name)
+
+                self.games.append(clean_line)
+                self.games_json.append({
+                    "name": translated_name,
+                    "is_dlc": is_dlc,
+                    "is_mixed": is_mixed
+                })
+
+        self.is_valid = id_found and price_found and len(self.games) > 0
+
+
+def _load_corpus(path):
+    """Channel messages as [(tg_msg_id, text)], one JSON object per line."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [(msg['tg_msg_id'], msg['text']) for msg in map(json.loads, f) if msg.get('text')]
+
+
+def _parsed(pack):
+    return json.dumps([pack.id, pack.games, pack.games_json, pack.original_price, pack.final_price, pack.is_valid],
+                      ensure_ascii=False)
+
+
+def bench_parser(corpus_path, rounds):
+    messages = _load_corpus(corpus_path)
+    # Same input, same output: compare the serialized parse of every message first
+    mismatches = [msg_id for msg_id, text in messages
+                  if _parsed(LegacyGenericPack(text, msg_id)) != _parsed(GenericPack(text, msg_id))]
+    if mismatches:
+        raise SystemExit(f"Parsers disagree on messages {mismatches[:10]}")
+
+    valid = sum(GenericPack(text, msg_id).is_valid for msg_id, text in messages)
+    print(f"{len(messages)} messages ({valid} valid packs) x {rounds} rounds, outputs identical")
+    print(f"{'parser':<10} {'total':>10} {'msgs/s':>12}")
+    timings = []
+    for name, cls in (("legacy", LegacyGenericPack), ("compiled", GenericPack)):
+        started = time.perf_counter()
+        for _ in range(rounds):
+            for msg_id, text in messages:
+                cls(text, msg_id)
+        elapsed = time.perf_counter() - started
+        timings.append(elapsed)
+        print(f"{name:<10} {elapsed:>9.3f}s {len(messages) * rounds / elapsed:>12,.0f}")
+    print(f"speedup {timings[0] / timings[1]:.1f}x")
+
+
+def bench_scrape(dump_path, mode):
+    """Replay a message dump through a scrape mode into a scratch database, no browser involved."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'bench.db'))
+        source = JsonlMessageSource(dump_path)
+        scraper = NintendoScraper(db, source=source)
+        if mode == 'verify':
+            # Something to audit: the dump itself, saved first
+            asyncio.run(scraper.scrape_full(message_count=10 ** 9))
+        started = time.perf_counter()
+        if mode == 'full':
+            result = asyncio.run(scraper.scrape_full(message_count=10 ** 9))
+        elif mode == 'today':
+            result = asyncio.run(scraper.scrape_today())
+        else:
+            result = asyncio.run(scraper.verify_deleted())
+        elapsed = time.perf_counter() - started
+        db.get_connection().close()
+    print(f"{mode}: result {result}, {source.messages_read} messages in {elapsed:.3f}s "
+          f"({source.messages_read / elapsed:,.0f} msgs/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='bench', required=True)
+
+    save = subparsers.add_parser('save_packs', help='Row-by-row vs bulk Database.save_packs')
+    save.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+
+    parse = subparsers.add_parser('parser', help='Legacy vs compiled GenericPack parsing over a message corpus')
+    parse.add_argument('--corpus', default=CORPUS_PATH, help='JSONL of {"tg_msg_id": int, "text": str}')
+    parse.add_argument('--rounds', type=int, default=50)
+
+    scrape = subparsers.add_parser('scrape', help='Replay a JSONL message dump through a NintendoScraper mode')
+    scrape.add_argument('--dump', default=CORPUS_PATH, help='JSONL of {"tg_msg_id": int, "text": str}, oldest first')
+    scrape.add_argument('--mode', choices=['full', 'today', 'verify'], default='full')
+
+    args = parser.parse_args()
+    if args.bench == 'save_packs':
+        bench_save_packs(args.sizes)
+    elif args.bench == 'parser':
+        bench_parser(args.corpus, args.rounds)
+    elif args.bench == 'scrape':
+        bench_scrape(args.dump, args.mode)
+
+
+if __name__ == '__main__':
+    main()
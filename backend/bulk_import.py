@@ -0,0 +1,35 @@
+"""Backfill the catalog from an exported channel dump.
+
+Usage (from backend/):
+    python bulk_import.py dump.jsonl [--workers 4] [--chunk-size 2000] [--db nez_juegos.db]
+
+The dump is JSONL of {"tg_msg_id": int, "text": str}, oldest first. Messages
+are parsed in a process pool and bulk-loaded into the database the server
+uses (RAILWAY_VOLUME_MOUNT_PATH applies as usual). A running server notices
+the import on its next request and rebuilds its pack index; to run the
+import inside a live server, POST the dump to /api/admin/import instead.
+"""
+import argparse
+import asyncio
+import json
+
+from database import Database
+from scraper import NintendoScraper
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('dump', help='JSONL of {"tg_msg_id": int, "text": str}, oldest first')
+    parser.add_argument('--workers', type=int, default=None, help='parser processes (default: one per CPU)')
+    parser.add_argument('--chunk-size', type=int, default=2000, help='messages per parser task')
+    parser.add_argument('--db', default='nez_juegos.db', help='database file name inside the volume')
+    args = parser.parse_args()
+
+    db = Database(args.db)
+    scraper = NintendoScraper(db)
+    result = asyncio.run(scraper.import_dump(args.dump, workers=args.workers, chunk_size=args.chunk_size))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
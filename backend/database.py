@@ -1,20 +1,223 @@
 import sqlite3
 import os
 import json
+import bisect
+import functools
+import heapq
+import threading
 import unicodedata
+from collections import Counter
 from datetime import datetime
 
+
+class PackIndex:
+    """Resident snapshot of the active packs, keyed by ID.
+
+    Holds each pack dict exactly as get_packs returns it (games already parsed),
+    so a search only has to find matching IDs in SQL and never re-reads rows
+    or calls json.loads.
+    """
+
+    def __init__(self, generation, by_id):
+        self.generation = generation
+        self.by_id = by_id
+
+
+class SuggestionIndex:
+    """Trigram index of the distinct normalized game names of the active packs.
+
+    Each normalized name keeps the number of packs it appears in and the
+    original spellings seen for it; the most common spelling is the one shown.
+    Packs are added and removed one at a time, so a write only costs the lines
+    of the packs it touched.
+    """
+
+    # Candidate sets above this size are ranked by walking a sorted posting list
+    DENSE_CANDIDATES = 256
+
+    def __init__(self):
+        self.names = {}      # name_norm -> {'packs': int, 'spellings': Counter}
+        self.trigrams = {}   # trigram -> set of name_norm
+        self.pack_lines = {} # pack_id -> [(name, name_norm), ...]
+        self._ranked_postings = {} # trigram -> names sorted by (first position, -packs, name)
+
+    @staticmethod
+    def _trigrams(text):
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    def set_pack(self, pack_id, lines):
+        """Replace the lines contributed by a pack. An empty list removes the pack."""
+        self.remove_pack(pack_id)
+        if not lines:
+            return
+        self.pack_lines[pack_id] = lines
+
+        seen = set()
+        for name, name_norm in lines:
+            entry = self.names.get(name_norm)
+            if entry is None:
+                entry = self.names[name_norm] = {'packs': 0, 'spellings': Counter()}
+                for tri in self._trigrams(name_norm):
+                    self.trigrams.setdefault(tri, set()).add(name_norm)
+            entry['spellings'][name] += 1
+            if name_norm not in seen:
+                seen.add(name_norm)
+                entry['packs'] += 1
+                self._rerank(name_norm, entry['packs'] - 1, entry['packs'])
+
+    def remove_pack(self, pack_id):
+        lines = self.pack_lines.pop(pack_id, None)
+        if not lines:
+            return
+
+        seen = set()
+        for name, name_norm in lines:
+            entry = self.names[name_norm]
+            entry['spellings'][name] -= 1
+            if not entry['spellings'][name]:
+                del entry['spellings'][name]
+            if name_norm not in seen:
+                seen.add(name_norm)
+                entry['packs'] -= 1
+                self._rerank(name_norm, entry['packs'] + 1, entry['packs'])
+            if entry['packs'] == 0:
+                del self.names[name_norm]
+                for tri in self._trigrams(name_norm):
+                    postings = self.trigrams[tri]
+                    postings.discard(name_norm)
+                    if not postings:
+                        del self.trigrams[tri]
+
+    def search(self, partial_norm, limit=5):
+        """Top names containing partial_norm: earliest match first, then most packs, then alphabetical."""
+        grams = self._trigrams(partial_norm)
+        if not grams:
+            # Shorter than a trigram: substring fallback over every name
+            return self._rank(self.names, partial_norm, limit)
+
+        postings = []
+        for tri in grams:
+            names = self.trigrams.get(tri)
+            if not names:
+                return []
+            postings.append(names)
+        postings.sort(key=len)
+        candidates = postings[0].intersection(*postings[1:]) if len(postings) > 1 else postings[0]
+        if len(candidates) <= self.DENSE_CANDIDATES:
+            return self._rank(candidates, partial_norm, limit)
+
+        # Dense match: where the leading trigram first occurs is a lower bound for
+        # where partial_norm occurs, so walk that trigram's names in
+        # (first position, -packs, name) order and stop once nothing left can
+        # beat the current top results.
+        found = []
+        lead = partial_norm[:3]
+        for bound, neg_packs, name_norm in self._ranked_posting(lead):
+            if len(found) >= limit and (bound, neg_packs, name_norm) > found[-1]:
+                break
+            if name_norm not in candidates:
+                continue
+            pos = name_norm.find(partial_norm)
+            if pos != -1:
+                bisect.insort(found, (pos, neg_packs, name_norm))
+                del found[limit:]
+        return [self._display_name(name_norm) for _, _, name_norm in found]
+
+    def _rank(self, candidates, partial_norm, limit):
+        ranked = []
+        for name_norm in candidates:
+            pos = name_norm.find(partial_norm)
+            if pos != -1:
+                ranked.append((pos, -self.names[name_norm]['packs'], name_norm))
+        best = heapq.nsmallest(limit, ranked)
+        return [self._display_name(name_norm) for _, _, name_norm in best]
+
+    def _ranked_posting(self, tri):
+        ranked = self._ranked_postings.get(tri)
+        if ranked is None:
+            ranked = sorted((name_norm.find(tri), -self.names[name_norm]['packs'], name_norm)
+                            for name_norm in self.trigrams.get(tri, ()))
+            self._ranked_postings[tri] = ranked
+        return ranked
+
+    def _rerank(self, name_norm, old_packs, new_packs):
+        """Move a name whose pack count changed within the ranked postings built so far.
+        A count of 0 means the name is not (or no longer) listed."""
+        for tri in self._trigrams(name_norm):
+            ranked = self._ranked_postings.get(tri)
+            if ranked is None:
+                continue
+            pos = name_norm.find(tri)
+            if old_packs:
+                i = bisect.bisect_left(ranked, (pos, -old_packs, name_norm))
+                if i < len(ranked) and ranked[i][2] == name_norm:
+                    del ranked[i]
+            if new_packs:
+                bisect.insort(ranked, (pos, -new_packs, name_norm))
+            elif not ranked:
+                del self._ranked_postings[tri]
+
+    def _display_name(self, name_norm):
+        spellings = self.names[name_norm]['spellings']
+        return min(spellings, key=lambda name: (-spellings[name], name))
+
+
 class Database:
+    # Dirty packs above this count rebuild the suggestion index from scratch
+    SUGGESTION_REBUILD_THRESHOLD = 500
+    # Bound parameters per IN (...) query, under SQLite's historical limit of 999
+    SQL_CHUNK_SIZE = 500
+    # Tables with a row in data_versions
+    VERSIONED_TABLES = ('config', 'juegos', 'hot_titles', 'packs')
+
     def __init__(self, db_path='nez_juegos.db'):
         # In Railway, we mount a volume to persist data.
         # Fallback to local directory if not in Railway.
         volume_path = os.getenv('RAILWAY_VOLUME_MOUNT_PATH', os.path.dirname(os.path.dirname(__file__)))
         self.db_path = os.path.join(volume_path, db_path)
+        self._local = threading.local()  # One connection per thread, see get_connection
+
+        # Pack search index, rebuilt lazily whenever the packs data version moves.
+        # Shared by every gunicorn thread and the scraper thread of this process.
+        self._pack_index = None
+        self._pack_index_lock = threading.Lock()
+
+        # Autocomplete index, patched with the packs each write of this process
+        # touched (_suggestion_dirty_ids: packs data version -> pack IDs). A version
+        # missing from it (another process wrote, or too many writes piled up)
+        # means a full rebuild.
+        self._suggestion_index = None
+        self._suggestion_index_version = 0
+        self._suggestion_dirty_ids = {}
+        self._suggestion_index_lock = threading.Lock()
+
+        # Set to False by init_db when this SQLite build has no FTS5 module,
+        # keyword search then filters pack_games with instr() only.
+        self.fts_enabled = True
+
         self.init_db()
 
     def get_connection(self):
-        conn = sqlite3.connect(self.db_path)
+        """Return this thread's connection, opening and tuning it on first use.
+
+        Each gunicorn thread and the scraper thread keep one connection for
+        their lifetime. The database runs in WAL mode, so public reads keep
+        going while the scraper commits a large batch.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            return conn
+
+        conn = sqlite3.connect(self.db_path, timeout=10, cached_statements=256)
         conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = NORMAL')  # Durable across app crashes, fsync only at checkpoints
+        conn.execute('PRAGMA cache_size = -16000')   # 16 MB page cache
+        conn.execute('PRAGMA mmap_size = 67108864')  # 64 MB memory-mapped reads
+        conn.execute('PRAGMA temp_store = MEMORY')
+        # Used by the line-aware exclusion filter in get_packs
+        conn.create_function('nz_lower', 1, self._lower, deterministic=True)
+        self._local.conn = conn
         return conn
 
     def init_db(self):
@@ -30,6 +233,15 @@ class Database:
             )
             ''')
 
+            # Table: scrape_state (scraper bookkeeping, kept out of the public config table)
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS scrape_state (
+                key TEXT PRIMARY KEY,
+                value TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            ''')
+
             # Table: packs (Telegram scraped data)
             cursor.execute('''
             CREATE TABLE IF NOT EXISTS packs (
@@ -44,7 +256,8 @@ class Database:
                 is_featured INTEGER DEFAULT 0,
                 is_manually_deleted INTEGER DEFAULT 0,
                 manual_image_url TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                content_hash TEXT
             )
             ''')
             
@@ -64,6 +277,87 @@ class Database:
             except sqlite3.OperationalError:
                 pass # Column already exists
 
+            # Digest of the pack's games (GenericPack.content_hash), NULL for packs saved before it existed
+            try:
+                cursor.execute("ALTER TABLE packs ADD COLUMN content_hash TEXT")
+            except sqlite3.OperationalError:
+                pass # Column already exists
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_packs_content_hash ON packs (content_hash)")
+
+            # Catalog order (newest message first) as an index, so keyset pages are range scans
+            cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_packs_catalog_order
+            ON packs (COALESCE(tg_msg_id, 0) DESC, CAST(id AS INTEGER) DESC, id DESC)
+            WHERE is_manually_deleted = 0
+            ''')
+
+            # Table: pack_games (One row per game line of a pack, mirrors packs.games_json)
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'pack_games'")
+            pack_games_exists = cursor.fetchone() is not None
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS pack_games (
+                id INTEGER PRIMARY KEY,
+                pack_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                name TEXT NOT NULL DEFAULT '',
+                name_norm TEXT NOT NULL DEFAULT '',
+                is_dlc INTEGER DEFAULT 0,
+                is_mixed INTEGER DEFAULT 0,
+                UNIQUE (pack_id, position)
+            )
+            ''')
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_pack_games_dlc ON pack_games (pack_id) WHERE is_dlc = 1")
+            cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS packs_delete_games AFTER DELETE ON packs BEGIN
+                DELETE FROM pack_games WHERE pack_id = OLD.id;
+            END
+            ''')
+
+            # Migration: split existing games_json blobs into pack_games rows
+            if not pack_games_exists:
+                cursor.execute('SELECT id, games_json FROM packs')
+                self._write_pack_games_bulk(cursor, {
+                    row['id']: json.loads(row['games_json']) if row['games_json'] else []
+                    for row in cursor.fetchall()
+                }, update_fts=False)
+
+            # Migration: the first FTS index was a per-pack table fed from games_json,
+            # the second one was kept in sync by per-row triggers on pack_games
+            for trigger in ('packs_fts_ai', 'packs_fts_ad', 'packs_fts_au',
+                            'pack_games_fts_ai', 'pack_games_fts_ad', 'pack_games_fts_au'):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            cursor.execute("DROP TABLE IF EXISTS packs_fts")
+
+            # Table: pack_games_fts (Trigram full-text index over pack_games.name_norm)
+            # name_norm is lowercased and accent-stripped, so a quoted MATCH phrase
+            # behaves like an indexed substring test. It is written by
+            # _write_pack_games_bulk with set-based statements: FTS5 flushes its
+            # pending terms at every trigger savepoint, which made per-row
+            # triggers ~10x slower for a full scrape.
+            try:
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'pack_games_fts'")
+                fts_exists = cursor.fetchone() is not None
+                cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS pack_games_fts USING fts5(
+                    name_norm, content='pack_games', content_rowid='id', tokenize='trigram'
+                )
+                ''')
+                if not fts_exists:
+                    cursor.execute("INSERT INTO pack_games_fts (pack_games_fts) VALUES ('rebuild')")
+
+                # Deleting a pack also drops its lines from the FTS index
+                cursor.execute("DROP TRIGGER packs_delete_games")
+                cursor.execute('''
+                CREATE TRIGGER packs_delete_games AFTER DELETE ON packs BEGIN
+                    INSERT INTO pack_games_fts (pack_games_fts, rowid, name_norm)
+                        SELECT 'delete', id, name_norm FROM pack_games WHERE pack_id = OLD.id;
+                    DELETE FROM pack_games WHERE pack_id = OLD.id;
+                END
+                ''')
+            except sqlite3.OperationalError as e:
+                print(f"[DB] FTS5 not available, keyword search will scan pack_games: {e}")
+                self.fts_enabled = False
+
             # Table: juegos (Individual Games CRUD)
             cursor.execute('''
             CREATE TABLE IF NOT EXISTS juegos (
@@ -79,6 +373,17 @@ class Database:
             )
             ''')
             
+            # Table: data_versions (Write counter per table, bumped in the same transaction
+            # as the write, so writes from any process, bulk_import.py included, are seen)
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS data_versions (
+                name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            )
+            ''')
+            cursor.executemany("INSERT OR IGNORE INTO data_versions (name) VALUES (?)",
+                               [(table,) for table in self.VERSIONED_TABLES])
+
             # Table: hot_titles (For adding 🔥 emojis)
             cursor.execute('''
             CREATE TABLE IF NOT EXISTS hot_titles (
@@ -119,8 +424,27 @@ class Database:
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('INSERT OR REPLACE INTO config (key, value) VALUES (?, ?)', (key, value))
+            self._bump_data_version(conn, 'config')
             conn.commit()
-            return True
+        return True
+
+    # --- SCRAPE STATE ---
+    def get_scrape_state(self, key, default=None):
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT value FROM scrape_state WHERE key = ?', (key,))
+            row = cursor.fetchone()
+            return row['value'] if row else default
+
+    def set_scrape_state(self, key, value):
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO scrape_state (key, value, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT (key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+            ''', (key, value))
+            conn.commit()
+        return True
 
     # --- JUEGOS CRUD ---
     def get_all_juegos(self):
@@ -161,8 +485,9 @@ class Database:
                 data.get('precio_alquiler'),
                 data.get('imagen_filename')
             ))
+            self._bump_data_version(conn, 'juegos')
             conn.commit()
-            return cursor.lastrowid
+        return cursor.lastrowid
 
     def update_juego(self, juego_id, data):
         with self.get_connection() as conn:
@@ -181,15 +506,17 @@ class Database:
                 data.get('imagen_filename'),
                 juego_id
             ))
+            self._bump_data_version(conn, 'juegos')
             conn.commit()
-            return True
+        return True
 
     def delete_juego(self, juego_id):
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('DELETE FROM juegos WHERE id = ?', (juego_id,))
+            self._bump_data_version(conn, 'juegos')
             conn.commit()
-            return True
+        return True
 
     # --- PACKS CRUD & SCRAPING LOGIC ---
     def save_packs(self, packs_list, is_scrape_today=False):
@@ -201,57 +528,88 @@ class Database:
         If is_scrape_today=False (full scrape):
           - Existing packs are updated (preserving is_new flag).
           - New packs are inserted with is_new=0.
+
+        Runs as one transaction: existing IDs, deletion flags and games are
+        fetched in bulk, then packs are upserted with executemany and only packs
+        whose games changed get their pack_games rows rewritten. A pack repeated
+        in the list behaves as if saved one after the other.
+
+        A pack whose content_hash is already stored under another ID (the same
+        games reposted, saved by an earlier run) is skipped as a duplicate.
         """
-        added_count = 0
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            
+            cursor.execute('BEGIN IMMEDIATE')
+
+            # 1. Prefetch which IDs already exist, which were manually deleted and their games
+            existing = {}
+            stored_games = {}
+            ids = list({pack['id']: None for pack in packs_list})
+            for start in range(0, len(ids), self.SQL_CHUNK_SIZE):
+                chunk = ids[start:start + self.SQL_CHUNK_SIZE]
+                cursor.execute(f"SELECT id, is_manually_deleted, games_json FROM packs WHERE id IN ({','.join('?' for _ in chunk)})", chunk)
+                for row in cursor.fetchall():
+                    existing[row['id']] = row['is_manually_deleted']
+                    stored_games[row['id']] = row['games_json']
+            stored_hashes = self._pack_ids_by_content_hash(cursor, [pack.get('content_hash') for pack in packs_list])
+
+            # 2. Decide what happens to each pack, in list order
+            upserts = []
+            games_by_id = {}
+            added_count = 0
             for pack in packs_list:
-                # 1. Check if it already exists
-                cursor.execute('SELECT id, is_manually_deleted FROM packs WHERE id = ?', (pack['id'],))
-                existing = cursor.fetchone()
-                
                 # Skip manually deleted packs always
-                if existing and existing['is_manually_deleted'] == 1:
+                if existing.get(pack['id']) == 1:
                     continue
-                
-                games_json_str = json.dumps(pack.get('games_json', []))
-                
-                if existing:
+
+                # Skip reposts of a pack stored under another ID
+                same_games = stored_hashes.get(pack.get('content_hash'), ())
+                if same_games and pack['id'] not in same_games:
+                    continue
+
+                if pack['id'] in existing:
                     if is_scrape_today:
                         # "Escanear Hoy": pack already in catalog, skip it
                         continue
-                    else:
-                        # Full scrape: update existing pack data, keep is_new as-is
-                        cursor.execute('''
-                            UPDATE packs SET 
-                                tg_msg_id=?, raw_text=?, games_json=?, price_usd=?, price_local=?, 
-                                cover_url=COALESCE(?, cover_url)
-                            WHERE id=?
-                        ''', (
-                            pack.get('tg_msg_id', 0), pack['raw_text'], games_json_str,
-                            pack['price_usd'], pack['price_local'], pack.get('cover_url'),
-                            pack['id']
-                        ))
                 else:
-                    # Truly new pack - insert it
-                    cursor.execute('''
-                        INSERT INTO packs (id, tg_msg_id, raw_text, games_json, price_usd, price_local, cover_url, is_new)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        pack['id'],
-                        pack.get('tg_msg_id', 0),
-                        pack['raw_text'],
-                        games_json_str,
-                        pack['price_usd'],
-                        pack['price_local'],
-                        pack.get('cover_url'),
-                        1 if is_scrape_today else 0
-                    ))
+                    # Truly new pack - inserted with is_new set for "Escanear Hoy"
+                    existing[pack['id']] = 0
                     added_count += 1
-            
+
+                # Full scrape: an existing pack is updated, keeping is_new as-is
+                games_json_str = json.dumps(pack.get('games_json', []))
+                upserts.append((
+                    pack['id'],
+                    pack.get('tg_msg_id', 0),
+                    pack['raw_text'],
+                    games_json_str,
+                    pack['price_usd'],
+                    pack['price_local'],
+                    pack.get('cover_url'),
+                    1 if is_scrape_today else 0,
+                    pack.get('content_hash')
+                ))
+                if stored_games.get(pack['id']) != games_json_str:
+                    stored_games[pack['id']] = games_json_str
+                    games_by_id[pack['id']] = pack.get('games_json', [])
+
+            # 3. Write packs, then replace their game lines
+            cursor.executemany('''
+                INSERT INTO packs (id, tg_msg_id, raw_text, games_json, price_usd, price_local, cover_url, is_new, content_hash)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET
+                    tg_msg_id=excluded.tg_msg_id, raw_text=excluded.raw_text, games_json=excluded.games_json,
+                    price_usd=excluded.price_usd, price_local=excluded.price_local,
+                    cover_url=COALESCE(excluded.cover_url, packs.cover_url),
+                    content_hash=COALESCE(excluded.content_hash, packs.content_hash)
+            ''', upserts)
+            self._write_pack_games_bulk(cursor, games_by_id)
+
+            version = self._bump_data_version(conn, 'packs') if upserts else None
             conn.commit()
-            return added_count
+        if version is not None:
+            self._packs_written(version, games_by_id.keys())
+        return added_count
 
     def mark_pack_deleted(self, pack_id, manual=False):
         """Marks a pack as deleted. If 'manual' is True, it flags it so it never comes back."""
@@ -262,8 +620,60 @@ class Database:
             else:
                 # If deleted by the sync process, we just remove it physically
                 cursor.execute('DELETE FROM packs WHERE id = ?', (pack_id,))
+            version = self._bump_data_version(conn, 'packs')
             conn.commit()
-            return True
+        self._packs_written(version, [pack_id])
+        return True
+
+    def reconcile_deleted(self, seen_ids, min_seen, max_delete_ratio):
+        """Delete the active scraped packs whose ID is not in seen_ids (the IDs found in Telegram).
+
+        The diff is an anti-join against a temp table of the seen IDs, and the
+        whole reconciliation runs in one transaction. Manually added packs
+        (MANUAL- prefix) are never candidates. Nothing is deleted when fewer
+        than min_seen IDs were seen (the chat likely didn't load) or when more
+        than max_delete_ratio of the scraped packs would go (a scan error, not
+        real deletions).
+
+        Returns a report: scanned, audited (active scraped packs), candidates,
+        deleted, deleted_ids, aborted (None, 'too_few_seen' or 'too_many_deletions')
+        and the min_seen and max_delete_ratio thresholds it was checked against.
+        """
+        seen_ids = {str(pack_id) for pack_id in seen_ids}
+        report = {"scanned": len(seen_ids), "audited": 0, "candidates": 0,
+                  "deleted": 0, "deleted_ids": [], "aborted": None,
+                  "min_seen": min_seen, "max_delete_ratio": max_delete_ratio}
+        scraped_active = "is_manually_deleted = 0 AND id NOT GLOB 'MANUAL-*'"
+        missing = f"{scraped_active} AND id NOT IN (SELECT id FROM temp.seen_pack_ids)"
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('CREATE TEMP TABLE IF NOT EXISTS seen_pack_ids (id TEXT PRIMARY KEY)')
+            cursor.execute('DELETE FROM temp.seen_pack_ids')
+            cursor.executemany('INSERT INTO temp.seen_pack_ids (id) VALUES (?)', ((i,) for i in seen_ids))
+
+            cursor.execute(f'SELECT COUNT(*) FROM packs WHERE {scraped_active}')
+            report["audited"] = cursor.fetchone()[0]
+            cursor.execute(f'SELECT id FROM packs WHERE {missing}')
+            candidate_ids = [row['id'] for row in cursor.fetchall()]
+            report["candidates"] = len(candidate_ids)
+
+            if len(seen_ids) < min_seen:
+                report["aborted"] = 'too_few_seen'
+            elif candidate_ids and len(candidate_ids) > report["audited"] * max_delete_ratio:
+                report["aborted"] = 'too_many_deletions'
+            else:
+                # If deleted by the sync process, we just remove it physically
+                cursor.execute(f'DELETE FROM packs WHERE {missing}')
+                report["deleted"] = cursor.rowcount
+                report["deleted_ids"] = candidate_ids
+            cursor.execute('DELETE FROM temp.seen_pack_ids')
+            version = self._bump_data_version(conn, 'packs') if report["deleted"] else None
+            conn.commit()
+        if version is not None:
+            self._packs_written(version, candidate_ids)
+        return report
 
     def get_all_active_pack_ids(self):
         """Returns a list of all pack IDs that are currently visible to the client."""
@@ -272,103 +682,252 @@ class Database:
             cursor.execute('SELECT id FROM packs WHERE is_manually_deleted = 0')
             return [row['id'] for row in cursor.fetchall()]
 
-    def get_packs(self, query='', exclude='', price_max=None, dlc_only=False, featured_only=False, limit=500):
-        """Advanced Search for Packs - Uses SQLite json1 extension and filtering"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Base query: only show packs that weren't manually deleted
-            sql = "SELECT * FROM packs WHERE is_manually_deleted = 0"
-            params = []
-            
-            if featured_only:
-                sql += " AND is_featured = 1"
-                
-            if price_max is not None:
-                sql += " AND price_local <= ?"
-                params.append(price_max)
-                
-            cursor.execute(sql + " ORDER BY COALESCE(tg_msg_id, 0) DESC, CAST(id AS INTEGER) DESC", params)
-            all_packs = cursor.fetchall()
-            
-            results = []
-            query_parts = [q.lower().strip() for q in query.split() if q.strip()]
-            exclude_parts = [e.lower().strip() for e in exclude.split() if e.strip()]
-            
-            for row in all_packs:
+    def _pack_ids_by_content_hash(self, cursor, content_hashes):
+        """Map each given content hash to the IDs of the stored packs with the same games.
+
+        Uses idx_packs_content_hash; hashes with no pack are left out. Manually
+        deleted packs are included, a duplicate of one is still a duplicate.
+        Runs on the caller's cursor, inside its transaction.
+        """
+        matches = {}
+        content_hashes = list(dict.fromkeys(h for h in content_hashes if h))
+        for start in range(0, len(content_hashes), self.SQL_CHUNK_SIZE):
+            chunk = content_hashes[start:start + self.SQL_CHUNK_SIZE]
+            cursor.execute(f"SELECT content_hash, id FROM packs WHERE content_hash IN ({','.join('?' for _ in chunk)})", chunk)
+            for row in cursor.fetchall():
+                matches.setdefault(row['content_hash'], []).append(row['id'])
+        return matches
+
+    def data_version(self, table):
+        """Write counter of a table ('config', 'juegos', 'hot_titles' or 'packs'), shared by every process."""
+        cursor = self.get_connection().execute('SELECT version FROM data_versions WHERE name = ?', (table,))
+        return cursor.fetchone()[0]
+
+    def _bump_data_version(self, conn, table):
+        """Increment a table's write counter inside the caller's transaction. Returns the new version."""
+        conn.execute('UPDATE data_versions SET version = version + 1 WHERE name = ?', (table,))
+        return conn.execute('SELECT version FROM data_versions WHERE name = ?', (table,)).fetchone()[0]
+
+    def _packs_written(self, version, pack_ids=()):
+        """Record which packs the committed packs write `version` touched.
+
+        pack_ids lists the packs whose games or visibility changed, so the
+        suggestion index can refresh just those.
+        """
+        with self._pack_index_lock:
+            dirty = self._suggestion_dirty_ids
+            dirty[version] = set(pack_ids)
+            if sum(len(ids) for ids in dirty.values()) > self.SUGGESTION_REBUILD_THRESHOLD:
+                # Cheaper to rebuild than to patch; an empty record forces the rebuild
+                dirty.clear()
+
+    def _get_pack_index(self):
+        """Return the pack index for the current packs data version, rebuilding it if stale."""
+        index = self._pack_index
+        if index is not None and index.generation == self.data_version('packs'):
+            return index
+
+        with self._pack_index_lock:
+            index = self._pack_index
+            if index is not None and index.generation == self.data_version('packs'):
+                return index
+
+            # Version and rows come from one read transaction, so they always match
+            conn = self.get_connection()
+            conn.execute('BEGIN')
+            try:
+                generation = self.data_version('packs')
+                rows = conn.execute("SELECT * FROM packs WHERE is_manually_deleted = 0").fetchall()
+            finally:
+                conn.commit()
+
+            by_id = {}
+            for row in rows:
                 pack_dict = dict(row)
-                games = json.loads(pack_dict['games_json']) if pack_dict['games_json'] else []
-                pack_dict['games'] = games # parsed list for the UI
-                pack_dict['manual_image_url'] = pack_dict.get('manual_image_url')
-                
-                # 1. ID Match Short-circuit
-                if query.strip().isdigit() and query.strip() == pack_dict['id']:
-                    results.append(pack_dict)
-                    continue
-                
-                # 2. DLC Only Filter
-                if dlc_only:
-                    # If the pack doesn't have ANY dlc, skip
-                    if not any(g.get('is_dlc', False) for g in games):
-                        continue
-                        
-                # 3. Keyword Match Logic
-                games_text_all = self._strip_accents(" ".join([g.get('name', '') for g in games]).lower())
-                
-                # Require ALL query parts
-                matches_query = True
-                for kw in query_parts:
-                    if self._strip_accents(kw) not in games_text_all:
-                        matches_query = False
-                        break
-                
-                if not matches_query:
-                    continue
-                    
-                # 4. Exclusion Logic (Line-aware)
-                should_exclude = False
-                if exclude_parts:
-                    for game in games:
-                        g_name = game.get('name', '').lower()
-                        # If this specific game line matches the query (or query is empty)
-                        is_relevant = not query_parts or any(kw in g_name for kw in query_parts)
-                        if is_relevant:
-                            # If it also contains an excluded keyword, drop the whole pack
-                            if any(ex in g_name for ex in exclude_parts):
-                                should_exclude = True
-                                break
-                                
-                if should_exclude:
-                    continue
-                    
-                results.append(pack_dict)
-                if len(results) >= limit:
+                pack_dict['games'] = json.loads(pack_dict['games_json']) if pack_dict['games_json'] else [] # parsed list for the UI
+                by_id[pack_dict['id']] = pack_dict
+
+            index = PackIndex(generation, by_id)
+            self._pack_index = index
+            return index
+
+    def get_packs(self, query='', exclude='', price_max=None, dlc_only=False, featured_only=False, limit=500):
+        """Advanced Search for Packs - Filters in SQL over pack_games, rows come from the PackIndex"""
+        return self.get_packs_page(query, exclude, price_max, dlc_only, featured_only, limit)[0]
+
+    def get_packs_page(self, query='', exclude='', price_max=None, dlc_only=False, featured_only=False, limit=500, after=None):
+        """One page of get_packs results plus the position to continue from.
+
+        Positions are catalog sort keys (COALESCE(tg_msg_id, 0), CAST(id AS INTEGER), id),
+        compared as a row value so each page is an index range instead of an OFFSET.
+        Pass the returned position as `after` to get the next page; it is None
+        once a page comes back short.
+        """
+        index = self._get_pack_index()
+        rows = list(self._iter_pack_rows(query, exclude, price_max, dlc_only, featured_only, limit, after))
+
+        next_after = None
+        if rows and len(rows) >= limit:
+            last = rows[-1]
+            next_after = (last['sort_msg_id'], last['sort_num_id'], last['id'])
+
+        # Packs written after the index was taken show up on the next request
+        results = [dict(index.by_id[row['id']]) for row in rows if row['id'] in index.by_id]
+        return results, next_after
+
+    def iter_packs(self, query='', exclude='', price_max=None, dlc_only=False, featured_only=False, limit=500, after=None):
+        """get_packs_page results one pack at a time, read off the SQLite cursor as they match."""
+        index = self._get_pack_index()
+        for row in self._iter_pack_rows(query, exclude, price_max, dlc_only, featured_only, limit, after):
+            pack = index.by_id.get(row['id'])
+            if pack is not None:
+                yield dict(pack)
+
+    def _iter_pack_rows(self, query, exclude, price_max, dlc_only, featured_only, limit, after):
+        """Yield (id, sort_msg_id, sort_num_id) rows of the packs matching the search, in catalog order."""
+        query_id = query.strip() if query.strip().isdigit() else None
+        query_parts = [q.lower().strip() for q in query.split() if q.strip()]
+        exclude_parts = [e.lower().strip() for e in exclude.split() if e.strip()]
+
+        # Base query: only show packs that weren't manually deleted
+        sql = ("SELECT p.id, COALESCE(p.tg_msg_id, 0) AS sort_msg_id, CAST(p.id AS INTEGER) AS sort_num_id "
+               "FROM packs p WHERE p.is_manually_deleted = 0")
+        params = []
+
+        if after is not None:
+            # The bound on the leading key alone is what lets SQLite seek idx_packs_catalog_order
+            sql += (" AND COALESCE(p.tg_msg_id, 0) <= ?"
+                    " AND (COALESCE(p.tg_msg_id, 0), CAST(p.id AS INTEGER), p.id) < (?, ?, ?)")
+            params.append(after[0])
+            params.extend(after)
+
+        if featured_only:
+            sql += " AND p.is_featured = 1"
+
+        if price_max is not None:
+            sql += " AND p.price_local <= ?"
+            params.append(price_max)
+
+        filters = []
+        match_params = []
+
+        # 2. DLC Only Filter: the pack needs at least one DLC line
+        if dlc_only:
+            filters.append("EXISTS (SELECT 1 FROM pack_games g WHERE g.pack_id = p.id AND g.is_dlc = 1)")
+
+        # 3. Keyword Match Logic: require ALL query parts, each in any line of the pack
+        for kw in query_parts:
+            kw_norm = self._strip_accents(kw)
+            if self.fts_enabled and len(kw_norm) >= 3:
+                filters.append("p.id IN (SELECT g.pack_id FROM pack_games_fts f JOIN pack_games g ON g.id = f.rowid "
+                               "WHERE pack_games_fts MATCH ? AND instr(g.name_norm, ?) > 0)")
+                match_params.extend([self._fts_phrase(kw_norm), kw_norm])
+            else:
+                filters.append("EXISTS (SELECT 1 FROM pack_games g WHERE g.pack_id = p.id AND instr(g.name_norm, ?) > 0)")
+                match_params.append(kw_norm)
+
+        # 4. Exclusion Logic (Line-aware): drop the pack if a line matching the
+        # query (or any line if the query is empty) also contains an excluded keyword
+        if exclude_parts:
+            is_excluded = " OR ".join("instr(nz_lower(g.name), ?) > 0" for _ in exclude_parts)
+            if query_parts:
+                is_relevant = " OR ".join("instr(nz_lower(g.name), ?) > 0" for _ in query_parts)
+                line_filter = f"({is_relevant}) AND ({is_excluded})"
+                match_params.extend(query_parts)
+            else:
+                line_filter = f"({is_excluded})"
+            filters.append(f"NOT EXISTS (SELECT 1 FROM pack_games g WHERE g.pack_id = p.id AND {line_filter})")
+            match_params.extend(exclude_parts)
+
+        if filters:
+            match_sql = " AND ".join(filters)
+            # 1. ID Match Short-circuit
+            if query_id is not None:
+                sql += f" AND (p.id = ? OR ({match_sql}))"
+                params.append(query_id)
+            else:
+                sql += f" AND {match_sql}"
+            params.extend(match_params)
+
+        # An ID match never ends the search by itself, so when it lands on the
+        # last slot one more pack still makes it in
+        sql += " ORDER BY COALESCE(p.tg_msg_id, 0) DESC, CAST(p.id AS INTEGER) DESC, p.id DESC LIMIT ?"
+        params.append(limit + 1 if query_id is not None else limit)
+
+        # Read-only, so no transaction to commit; closing the cursor also covers
+        # consumers that stop early (e.g. a client dropping a streamed response)
+        cursor = self.get_connection().cursor()
+        try:
+            cursor.execute(sql, params)
+            count = 0
+            last_id = None
+            for row in cursor:
+                if count == limit and last_id != query_id:
                     break
-                    
-            return results
+                yield row
+                count += 1
+                last_id = row['id']
+        finally:
+            cursor.close()
+
+    def _refresh_suggestion_index(self):
+        """Return the suggestion index, applying the packs written since the last call.
+
+        The index is patched in place, so the caller holds _suggestion_index_lock
+        both for this and for searching it.
+        """
+        index = self._suggestion_index
+        if index is not None and self._suggestion_index_version == self.data_version('packs'):
+            return index
+
+        conn = self.get_connection()
+        conn.execute('BEGIN')
+        try:
+            version = self.data_version('packs')
+            with self._pack_index_lock:
+                dirty = self._suggestion_dirty_ids
+                # Patch only when this process recorded every write since the index was built
+                pending = range(self._suggestion_index_version + 1, version + 1) if index is not None else ()
+                rebuild = index is None or any(v not in dirty for v in pending)
+                dirty_ids = set().union(*(dirty[v] for v in pending)) if not rebuild else set()
+                for v in [v for v in dirty if v <= version]:
+                    del dirty[v]
+
+            sql = '''
+                SELECT g.pack_id, g.name, g.name_norm FROM pack_games g JOIN packs p ON p.id = g.pack_id
+                WHERE p.is_manually_deleted = 0
+            '''
+            params = []
+            if not rebuild:
+                sql += f" AND g.pack_id IN ({','.join('?' for _ in dirty_ids)})"
+                params = list(dirty_ids)
+            rows = conn.execute(sql + " ORDER BY g.pack_id, g.position", params).fetchall() if rebuild or dirty_ids else []
+        finally:
+            conn.commit()
+
+        lines_by_pack = {}
+        for row in rows:
+            lines_by_pack.setdefault(row['pack_id'], []).append((row['name'], row['name_norm']))
+
+        if rebuild:
+            index = SuggestionIndex()
+            for pack_id, lines in lines_by_pack.items():
+                index.set_pack(pack_id, lines)
+            self._suggestion_index = index
+        else:
+            for pack_id in dirty_ids:
+                index.set_pack(pack_id, lines_by_pack.get(pack_id, []))
+        self._suggestion_index_version = version
+        return index
 
     def get_game_name_suggestions(self, partial_name, limit=5):
-        """Extracts unique game names from the packs table that match the partial string."""
+        """Returns unique game names of active packs that contain the partial string, best matches first."""
         if len(partial_name) < 3:
             return []
-            
-        partial_lower = partial_name.lower()
-        partial_norm = self._strip_accents(partial_lower)
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT games_json FROM packs WHERE is_manually_deleted = 0')
-            rows = cursor.fetchall()
-            
-            matches = set()
-            for row in rows:
-                games = json.loads(row['games_json']) if row['games_json'] else []
-                for game in games:
-                    name = game.get('name', '')
-                    if partial_norm in self._strip_accents(name.lower()):
-                        matches.add(name)
-                        
-            # Return alphabetical sorted list
-            return sorted(list(matches))[:limit]
+
+        partial_norm = self._strip_accents(partial_name.lower())
+        with self._suggestion_index_lock:
+            return self._refresh_suggestion_index().search(partial_norm, limit)
 
     def count_featured_packs(self):
         with self.get_connection() as conn:
@@ -393,8 +952,10 @@ class Database:
                     return False # Over limit
 
             cursor.execute('UPDATE packs SET is_featured = ? WHERE id = ?', (new_val, pack_id))
+            version = self._bump_data_version(conn, 'packs')
             conn.commit()
-            return True
+        self._packs_written(version)
+        return True
 
     def insert_manual_pack(self, pack_data):
         """Insert a manually created pack into the database."""
@@ -417,8 +978,11 @@ class Database:
                 1, # Mark as new so it stands out
                 0
             ))
+            self._write_pack_games(cursor, pseudo_id, pack_data.get('games', []))
+            version = self._bump_data_version(conn, 'packs')
             conn.commit()
-            return pseudo_id
+        self._packs_written(version, [pseudo_id])
+        return pseudo_id
 
     # --- Hot Titles CRUD ---
     def get_hot_titles(self):
@@ -432,15 +996,17 @@ class Database:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('INSERT INTO hot_titles (titulo) VALUES (?)', (titulo.strip(),))
+                self._bump_data_version(conn, 'hot_titles')
                 conn.commit()
-                return True
         except sqlite3.IntegrityError:
             return False # Already exists
+        return True
             
     def delete_hot_title(self, id):
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('DELETE FROM hot_titles WHERE id = ?', (id,))
+            self._bump_data_version(conn, 'hot_titles')
             conn.commit()
 
     @staticmethod
@@ -448,3 +1014,65 @@ class Database:
         """Remove diacritics/accents from a string for accent-insensitive comparison."""
         nfkd = unicodedata.normalize('NFKD', text)
         return ''.join(c for c in nfkd if not unicodedata.combining(c))
+
+    def _write_pack_games(self, cursor, pack_id, games):
+        """Replace the pack_games rows of a pack. Runs inside the caller's transaction."""
+        self._write_pack_games_bulk(cursor, {pack_id: games})
+
+    def _write_pack_games_bulk(self, cursor, games_by_id, update_fts=True):
+        """Replace the pack_games rows (and FTS entries) of many packs at once ({pack_id: games})."""
+        update_fts = update_fts and self.fts_enabled
+        ids = list(games_by_id)
+        for start in range(0, len(ids), self.SQL_CHUNK_SIZE):
+            chunk = ids[start:start + self.SQL_CHUNK_SIZE]
+            placeholders = ','.join('?' for _ in chunk)
+            if update_fts:
+                cursor.execute(f'''
+                    INSERT INTO pack_games_fts (pack_games_fts, rowid, name_norm)
+                    SELECT 'delete', id, name_norm FROM pack_games WHERE pack_id IN ({placeholders})
+                ''', chunk)
+            cursor.execute(f'DELETE FROM pack_games WHERE pack_id IN ({placeholders})', chunk)
+
+        # New rows get ids above the current maximum, index them in one statement
+        cursor.execute('SELECT COALESCE(MAX(id), 0) FROM pack_games')
+        last_id = cursor.fetchone()[0]
+        cursor.executemany('''
+            INSERT INTO pack_games (pack_id, position, name, name_norm, is_dlc, is_mixed)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [
+            row
+            for pack_id, games in games_by_id.items()
+            for row in self._pack_games_rows(pack_id, games)
+        ])
+        if update_fts:
+            cursor.execute('INSERT INTO pack_games_fts (rowid, name_norm) SELECT id, name_norm FROM pack_games WHERE id > ?', (last_id,))
+
+    @classmethod
+    def _pack_games_rows(cls, pack_id, games):
+        return [
+            (
+                pack_id,
+                position,
+                game.get('name', ''),
+                cls._normalize_name(game.get('name', '')),
+                1 if game.get('is_dlc', False) else 0,
+                1 if game.get('is_mixed', False) else 0,
+            )
+            for position, game in enumerate(games)
+        ]
+
+    @classmethod
+    @functools.lru_cache(maxsize=65536)
+    def _normalize_name(cls, name):
+        """pack_games.name_norm for a game name. Cached: a catalog repeats the same titles."""
+        return cls._strip_accents(name.lower())
+
+    @staticmethod
+    def _fts_phrase(text):
+        """Quote text as a single FTS5 phrase (a substring match under the trigram tokenizer)."""
+        return '"' + text.replace('"', '""') + '"'
+
+    @staticmethod
+    def _lower(text):
+        """Python's Unicode-aware lower(); SQLite's built-in only folds ASCII (SQL: nz_lower)."""
+        return text.lower() if isinstance(text, str) else text
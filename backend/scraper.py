@@ -1,18 +1,69 @@
 import asyncio
+import hashlib
 import re
 import os
 import time
 import json
+import multiprocessing
+import shutil
 import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from playwright.async_api import async_playwright
 
+from sources import JsonlMessageSource, LiveMessageWatcher, PlaywrightMessageSource
+
 # --- CONFIGURATION ---
 SOURCE_CHAT = "evAn Accounts"
 PRICE_MULTIPLIER = 3000
 RAILWAY_VOLUME = os.getenv('RAILWAY_VOLUME_MOUNT_PATH', os.getcwd())
 USER_DATA_DIR = os.path.join(RAILWAY_VOLUME, "browser_data_clean")
 
+# Lean mode (on unless SCRAPER_LEAN_MODE=0): once logged in, requests for these
+# resource types are aborted, only message text is read. Login stays unfiltered
+# so the QR page renders fully. CDP resource type names: only these requests are
+# paused through the Fetch domain, the rest never leave the browser and keep the
+# HTTP cache (a Playwright route would disable it for every request).
+LEAN_MODE = os.getenv('SCRAPER_LEAN_MODE', '1') != '0'
+BLOCKED_RESOURCE_TYPES = ('Image', 'Media', 'Font')
+DISK_CACHE_SIZE = 32 * 1024 * 1024
+# Profile directories Chromium rebuilds on demand, removed before each launch.
+# The Telegram session (Local Storage, IndexedDB, Service Worker) is kept.
+PRUNED_PROFILE_DIRS = (
+    "Crashpad", "GrShaderCache", "GraphiteDawnCache", "ShaderCache",
+    os.path.join("Default", "Cache"), os.path.join("Default", "Code Cache"), os.path.join("Default", "GPUCache"),
+    os.path.join("Default", "DawnGraphiteCache"), os.path.join("Default", "DawnWebGPUCache"),
+)
+
+# Browser health: how often the page is pinged while the browser is up, and how long it may take
+HEALTH_CHECK_INTERVAL = 30  # seconds
+HEALTH_CHECK_TIMEOUT = 10
+
+# The open chat's scroll state, or null when the page is not showing SOURCE_CHAT
+CHAT_STATE_JS = """
+(name) => {
+    const list = document.querySelector('.MessageList, .bubbles .scrollable, .messages-container');
+    const title = document.querySelector('.MiddleHeader .fullName, .MiddleHeader .title h3, .chat-info .peer-title');
+    if (!list || !title || !title.textContent.toLowerCase().includes(name.toLowerCase())) return null;
+    return {atBottom: list.scrollHeight - list.scrollTop - list.clientHeight < 80};
+}
+"""
+CHAT_AT_LATEST_JS = f"(name) => {{ const state = ({CHAT_STATE_JS.strip()})(name); return !!state && state.atBottom; }}"
+
+# Jump the open chat to its newest message (Telegram's "go to bottom" button when shown)
+SCROLL_TO_LATEST_JS = """
+() => {
+    const button = document.querySelector('.ScrollDownButton button, .bubbles-go-down');
+    if (button && button.offsetParent !== null) {
+        button.click();
+        return;
+    }
+    const list = document.querySelector('.MessageList, .bubbles .scrollable, .messages-container');
+    if (list) list.scrollTop = list.scrollHeight;
+}
+"""
+
 # Best-seller keywords for highlighting
 BEST_SELLERS = set([
     "mario kart", "mario odyssey", "mario bros", "mario party", "mario maker", "mario",
@@ -45,16 +96,126 @@ KNOWN_DLC_TITLES = [
     "pase de expansion",
 ]
 
-# Load game covers from JSON file
+# scrape_state key of the newest tg_msg_id whose message has been processed and saved
+HIGH_WATER_KEY = "high_water_msg_id"
+
+# verify_deleted safety guards: fewer IDs seen than this means the chat didn't load,
+# deleting more than this share of the scraped packs means a scan error
+VERIFY_MIN_SEEN = 10
+VERIFY_MAX_DELETE_RATIO = 0.6
+
+# Lines between the ID and the price that are channel boilerplate, not games
+SKIP_LINE_MARKERS = ("NINTENDO SWITCH ACCOUNT", "For buy:")
+
+# UI translations of a game line: the first rule whose keyword appears in the
+# lowercased line rewrites every case-insensitive occurrence of it
+TRANSLATION_RULES = [
+    ("only dlc", "Solo DLC"),
+    ("upgrade pack", "- Mejora"),
+    ("expansion pass", "Pase de Expansión"),
+]
+
+# --- Compiled parser tables (built once at import) ---
+ID_RE = re.compile(r"ID\s*:\s*(\d+)", re.IGNORECASE)
+PRICE_RE = re.compile(r"(\d+(?:\.\d+)?)\s*\$|\$\s*(\d+(?:\.\d+)?)")
+# Every DLC keyword and known DLC title in one alternation, longest first
+DLC_TRIGGER_RE = re.compile("|".join(
+    re.escape(kw) for kw in sorted(dict.fromkeys(DLC_KEYWORDS + KNOWN_DLC_TITLES), key=len, reverse=True)))
+TRANSLATIONS = [(keyword, re.compile(re.escape(keyword), re.IGNORECASE), replacement)
+                for keyword, replacement in TRANSLATION_RULES]
+
+class CoverMatcher:
+    """Aho-Corasick automaton over the cover keywords.
+
+    match() returns the URL of the keyword the old sorted scan would pick:
+    the longest keyword contained in the text, ties going to the one listed
+    first in game_covers.json. One walk over the text, whatever the number
+    of keywords.
+    """
+
+    def __init__(self, covers):
+        self.covers = covers
+        # Rank = position in the old scan order (length desc, stable), lower wins
+        self.keywords = sorted(covers, key=len, reverse=True)
+        no_match = len(self.keywords)
+
+        self.goto = [{}]
+        self.fail = [0]
+        self.best = [no_match]  # best rank ending at this state, own or through fail links
+        for rank, keyword in enumerate(self.keywords):
+            state = 0
+            for ch in keyword:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = self.goto[state][ch] = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.best.append(no_match)
+                state = nxt
+            self.best[state] = min(self.best[state], rank)
+
+        # Breadth-first, so fail targets (shorter suffixes) are final before they are read
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for ch, nxt in self.goto[state].items():
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[nxt] = self.goto[fallback].get(ch, 0)
+                self.best[nxt] = min(self.best[nxt], self.best[self.fail[nxt]])
+                queue.append(nxt)
+
+    def match(self, text):
+        goto, fail, best_at = self.goto, self.fail, self.best
+        state = 0
+        best = best_at[0]
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if best_at[state] < best:
+                best = best_at[state]
+        return self.covers[self.keywords[best]] if best < len(self.keywords) else None
+
+
+# Game covers from JSON file, reloaded when the file changes on disk
+COVERS_PATH = os.path.join(os.path.dirname(__file__), 'game_covers.json')
+COVERS_RELOAD_INTERVAL = 5  # seconds between mtime checks
 GAME_COVERS = {}
-try:
-    covers_path = os.path.join(os.path.dirname(__file__), 'game_covers.json')
-    if os.path.exists(covers_path):
-        with open(covers_path, 'r', encoding='utf-8') as f:
-            covers_data = json.load(f)
-            GAME_COVERS = covers_data.get('covers', {})
-except:
-    pass
+_cover_matcher = CoverMatcher({})
+_covers_mtime = None
+_covers_checked_at = 0
+_covers_lock = threading.Lock()
+
+def get_cover_matcher():
+    """Return the cover matcher, rebuilding it if game_covers.json changed since the last check."""
+    global GAME_COVERS, _cover_matcher, _covers_mtime, _covers_checked_at
+    now = time.monotonic()
+    if now - _covers_checked_at < COVERS_RELOAD_INTERVAL:
+        return _cover_matcher
+
+    with _covers_lock:
+        if now - _covers_checked_at >= COVERS_RELOAD_INTERVAL:
+            try:
+                mtime = os.stat(COVERS_PATH).st_mtime_ns
+            except OSError:
+                mtime = None
+            if mtime != _covers_mtime:
+                try:
+                    covers = {}
+                    if mtime is not None:
+                        with open(COVERS_PATH, 'r', encoding='utf-8') as f:
+                            covers = json.load(f).get('covers', {})
+                    _cover_matcher = CoverMatcher(covers)
+                    GAME_COVERS = covers
+                    _covers_mtime = mtime
+                except Exception as e:
+                    # Half-written or invalid file: keep the current covers and retry next check
+                    print(f"[COVERS] Could not load {COVERS_PATH}: {e}")
+            _covers_checked_at = now
+    return _cover_matcher
+
+get_cover_matcher()
 
 class GenericPack:
     def __init__(self, raw_text, tg_msg_id=0):
@@ -66,25 +227,26 @@ class GenericPack:
         self.original_price = 0
         self.final_price = 0
         self.is_valid = False
+        self._content_hash = None
         self._parse()
 
     def _parse(self):
-        lines = self.raw_text.split('\n')
         id_found = False
         price_found = False
         
-        for line in lines:
+        for line in self.raw_text.split('\n'):
             clean_line = line.strip()
             if not clean_line:
                 continue
             
-            id_match = re.search(r"ID\s*:\s*(\d+)", clean_line, re.IGNORECASE)
+            # An ID line needs a ':' and a price line a '$', skip the regex otherwise
+            id_match = ':' in clean_line and ID_RE.search(clean_line)
             if id_match:
                 self.id = id_match.group(1)
                 id_found = True
                 continue
             
-            price_match = re.search(r"(\d+(?:\.\d+)?)\s*\$|\$\s*(\d+(?:\.\d+)?)", clean_line)
+            price_match = '$' in clean_line and PRICE_RE.search(clean_line)
             if price_match:
                 price_str = price_match.group(1) or price_match.group(2)
                 self.original_price = int(float(price_str))
@@ -93,24 +255,21 @@ class GenericPack:
                 continue
 
             if id_found and not price_found:
-                if "NINTENDO SWITCH ACCOUNT" in clean_line: continue
-                if "For buy:" in clean_line: continue
+                if any(marker in clean_line for marker in SKIP_LINE_MARKERS): continue
                 
                 # Check if it's a DLC line
                 lower_line = clean_line.lower()
-                is_dlc_trigger = any(kw in lower_line for kw in DLC_KEYWORDS) or any(title in lower_line for title in KNOWN_DLC_TITLES)
+                is_dlc_trigger = DLC_TRIGGER_RE.search(lower_line) is not None
                 is_mixed = "+" in lower_line and is_dlc_trigger
                 
                 is_dlc = is_dlc_trigger and not is_mixed
                 
                 # Translations for the UI
                 translated_name = clean_line
-                if "only dlc" in lower_line:
-                    translated_name = re.sub(r"(?i)only dlc", "Solo DLC", translated_name)
-                elif "upgrade pack" in lower_line:
-                    translated_name = re.sub(r"(?i)upgrade pack", "- Mejora", translated_name)
-                elif "expansion pass" in lower_line:
-                    translated_name = re.sub(r"(?i)expansion pass", "Pase de Expansión", translated_name)
+                for keyword, pattern, replacement in TRANSLATIONS:
+                    if keyword in lower_line:
+                        translated_name = pattern.sub(replacement, translated_name)
+                        break
                 
                 self.games.append(clean_line) # raw original
                 self.games_json.append({
@@ -123,19 +282,16 @@ class GenericPack:
 
     @property
     def content_hash(self):
-        """Generate a hash based on games to detect duplicates"""
-        sorted_games = sorted([g.lower().strip() for g in self.games])
-        content_string = "|".join(sorted_games)
-        return hash(content_string)
+        """SHA-1 of the pack's games (order and case ignored), stable across restarts to detect duplicates"""
+        if self._content_hash is None:
+            sorted_games = sorted([g.lower().strip() for g in self.games])
+            content_string = "|".join(sorted_games)
+            self._content_hash = hashlib.sha1(content_string.encode('utf-8')).hexdigest()
+        return self._content_hash
 
     def get_cover_url(self):
         """Get cover URL for the first matching best-seller game in the pack"""
-        games_text = " ".join(self.games).lower()
-        sorted_keys = sorted(GAME_COVERS.keys(), key=len, reverse=True)
-        for keyword in sorted_keys:
-            if keyword in games_text:
-                return GAME_COVERS[keyword]
-        return None
+        return get_cover_matcher().match(" ".join(self.games).lower())
 
     def to_dict(self):
         """Convert to dict structure matching the SQLite DB schema parameters"""
@@ -146,21 +302,254 @@ class GenericPack:
             "games_json": self.games_json,
             "price_usd": self.original_price,
             "price_local": self.final_price,
-            "cover_url": self.get_cover_url()
+            "cover_url": self.get_cover_url(),
+            "content_hash": self.content_hash
         }
 
 
+def parse_messages(messages):
+    """Parse (tg_msg_id, text) pairs into pack dicts, dropping messages that are not valid packs.
+
+    Module-level so a ProcessPoolExecutor can run it.
+    """
+    packs = []
+    for tg_msg_id, text in messages:
+        pack = GenericPack(text, tg_msg_id)
+        if pack.is_valid:
+            packs.append(pack.to_dict())
+    return packs
+
+
+class ScrapePipeline:
+    """Scan stages connected by bounded queues: source -> parser -> writer.
+
+    The producer pulls message batches from the source while the parser turns
+    the previous ones into packs (inline, or in `executor` when given) and the
+    writer saves every WRITE_BATCH packs with save_packs in a worker thread.
+    Packs reach the catalog while the scan is still running, and only the
+    dedup sets grow with the number of messages.
+
+    Messages are deduplicated by text, packs by content hash and by ID; the
+    first occurrence wins, which is the newest message.
+
+    With an executor, up to `parse_ahead` batches are parsed at once and merged
+    back in source order, so the dedup result does not depend on timing.
+    """
+
+    WRITE_BATCH = 200
+    QUEUE_SIZE = 4
+
+    def __init__(self, db, source, is_scrape_today, executor=None, message_limit=None, mark=0, verbose=False,
+                 parse_ahead=1, write_batch=WRITE_BATCH, progress=None):
+        self.db = db
+        self.source = source
+        self.is_scrape_today = is_scrape_today
+        self.executor = executor
+        self.message_limit = message_limit  # stop after this many distinct messages
+        self.mark = mark                    # messages at or below this tg_msg_id are skipped and end the scan
+        self.verbose = verbose
+        self.parse_ahead = parse_ahead if executor else 1
+        self.write_batch = write_batch
+        self.progress = progress            # called with the pipeline after each parsed batch and each save
+        self.max_scrolls = None
+
+        self.batches = 0
+        self.scanned = 0
+        self.skipped = 0
+        self.reached_mark = False
+        self.newest_msg_id = mark
+        self.oldest_msg_id = None          # lowest tg_msg_id scanned, None until one is seen
+        self.packs_found = 0
+        self.added = 0
+        self.saved = 0
+        self.saves = 0
+
+    def covers(self, mark):
+        """True when the scan reached back to `mark`, so nothing between it and newest_msg_id was missed."""
+        if not mark or self.reached_mark:
+            return True
+        return self.oldest_msg_id is not None and self.oldest_msg_id <= mark
+
+    async def run(self, max_scrolls):
+        self.max_scrolls = max_scrolls
+        parse_queue = asyncio.Queue(self.QUEUE_SIZE)
+        write_queue = asyncio.Queue(self.QUEUE_SIZE)
+        tasks = [
+            asyncio.create_task(self._produce(max_scrolls, parse_queue)),
+            asyncio.create_task(self._parse(parse_queue, write_queue)),
+            asyncio.create_task(self._write(write_queue)),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return self
+
+    async def _produce(self, max_scrolls, parse_queue):
+        seen_texts = set()  # digests, not the texts themselves
+        async for batch in self.source.batches(max_scrolls):
+            self.batches += 1
+            fresh = []
+            # Batches are oldest first inside, newest first overall: walk them newest first
+            for tg_msg_id, text in reversed(batch):
+                if self.mark and 0 < tg_msg_id <= self.mark:
+                    # Already processed by an earlier run
+                    self.skipped += 1
+                    self.reached_mark = True
+                    continue
+                self.scanned += 1
+                self.newest_msg_id = max(self.newest_msg_id, tg_msg_id)
+                if tg_msg_id > 0 and (self.oldest_msg_id is None or tg_msg_id < self.oldest_msg_id):
+                    self.oldest_msg_id = tg_msg_id
+                digest = hashlib.sha1(text.encode('utf-8')).digest()
+                if digest not in seen_texts:
+                    seen_texts.add(digest)
+                    fresh.append((tg_msg_id, text))
+            if fresh:
+                await parse_queue.put(fresh)
+            if self.reached_mark or (self.message_limit and len(seen_texts) >= self.message_limit):
+                break
+        # End of input. On errors run() cancels the other stages instead.
+        await parse_queue.put(None)
+
+    async def _parse(self, parse_queue, write_queue):
+        loop = asyncio.get_running_loop()
+        seen_hashes = set()
+        seen_ids = set()
+        in_flight = deque()  # executor futures, in source order
+        try:
+            while True:
+                messages = await parse_queue.get()
+                if messages is not None:
+                    if not self.executor:
+                        await self._merge(parse_messages(messages), seen_hashes, seen_ids, write_queue)
+                        continue
+                    in_flight.append(loop.run_in_executor(self.executor, parse_messages, messages))
+                # Keep up to parse_ahead batches in the executor; drain them all at the end
+                while in_flight and (messages is None or len(in_flight) >= self.parse_ahead):
+                    await self._merge(await in_flight.popleft(), seen_hashes, seen_ids, write_queue)
+                if messages is None:
+                    break
+        finally:
+            for future in in_flight:
+                future.cancel()
+        await write_queue.put(None)
+
+    async def _merge(self, parsed, seen_hashes, seen_ids, write_queue):
+        packs = []
+        for pack in parsed:
+            if pack['content_hash'] in seen_hashes or pack['id'] in seen_ids:
+                continue
+            seen_hashes.add(pack['content_hash'])
+            seen_ids.add(pack['id'])
+            packs.append(pack)
+        self.packs_found += len(packs)
+        if packs:
+            await write_queue.put(packs)
+        if self.verbose:
+            print(f"[SCRAPE] Batch {self.batches}, found {self.packs_found} valid packs so far")
+        if self.progress:
+            self.progress(self)
+
+    async def _write(self, write_queue):
+        pending = []
+        while (packs := await write_queue.get()) is not None:
+            pending.extend(packs)
+            if len(pending) >= self.write_batch:
+                await self._save(pending)
+                pending = []
+        if pending:
+            await self._save(pending)
+
+    async def _save(self, packs):
+        self.added += await asyncio.to_thread(self.db.save_packs, packs, self.is_scrape_today)
+        self.saved += len(packs)
+        self.saves += 1
+        if self.progress:
+            self.progress(self)
+
+    def summary(self):
+        return f"{self.source.summary()}; {self.saves} saves"
+
+
+def _process_children():
+    """ppid -> [pid] of every process, read from /proc. None where /proc is not available."""
+    try:
+        entries = os.listdir('/proc')
+    except OSError:
+        return None
+    children = {}
+    for name in entries:
+        if not name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{name}/stat') as f:
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(name))
+    return children
+
+
+def _find_driver_pid():
+    """PID of the Playwright driver (a node process running `cli.js run-driver`) started by this process."""
+    for pid in (_process_children() or {}).get(os.getpid(), ()):
+        try:
+            with open(f'/proc/{pid}/cmdline', 'rb') as f:
+                if b'run-driver' in f.read():
+                    return pid
+        except OSError:
+            continue
+    return None
+
+
+def _process_tree_rss(root_pid):
+    """Resident memory in bytes of root_pid and its descendants (the Playwright driver and
+    Chromium). None where /proc is not available."""
+    children = _process_children()
+    if children is None or root_pid is None:
+        return None
+
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    total = 0
+    stack = [root_pid]
+    while stack:
+        pid = stack.pop()
+        try:
+            with open(f'/proc/{pid}/statm') as f:
+                total += int(f.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            pass
+        stack.extend(children.get(pid, ()))
+    return total
+
+
 class NintendoScraper:
-    def __init__(self, db_instance):
+    def __init__(self, db_instance, source=None):
         self.playwright = None
+        self.driver_pid = None
         self.browser_context = None
         self.page = None
         self.is_running = False
         self.telegram_connected = False
         self.db = db_instance
+        # Where scrape modes read messages from; the live chat unless a replay source is given
+        self.source = source or PlaywrightMessageSource(self)
+        # Optional executor for the parse stage of scrapes (e.g. a ProcessPoolExecutor)
+        self.parse_executor = None
         
         self.monitor_task = None
         self.monitor_active = False
+        self.live_watcher = None
+        self.network_bytes = 0
+        self.blocked_requests = 0
+        # Called with a dict of progress counters while a scrape mode runs (the server's job queue)
+        self.on_progress = None
+        self.health_task = None
+        self.recover_lock = None  # asyncio.Lock, created on the scraper loop by start()
 
     async def start(self):
         if self.is_running: return
@@ -175,7 +564,15 @@ class NintendoScraper:
                 except Exception as e:
                     pass
 
-        self.playwright = await async_playwright().start()
+        if LEAN_MODE:
+            self._prune_profile()
+
+        # The driver outlives browser restarts, only Chromium is relaunched
+        if self.playwright is None:
+            self.playwright = await async_playwright().start()
+            # Memory is measured from the driver down, not from this process: the
+            # gunicorn worker also has other children (the import's process pool)
+            self.driver_pid = _find_driver_pid()
         is_server = bool(os.getenv('RAILWAY_VOLUME_MOUNT_PATH'))
         
         self.browser_context = await self.playwright.chromium.launch_persistent_context(
@@ -189,11 +586,92 @@ class NintendoScraper:
                 "--disable-dev-shm-usage",
                 "--disable-gpu",
             ] + (["--headless"] if is_server else [])
+              + ([f"--disk-cache-size={DISK_CACHE_SIZE}", "--disable-gpu-shader-disk-cache"] if LEAN_MODE else [])
         )
         
         pages = self.browser_context.pages
         self.page = pages[0] if pages else await self.browser_context.new_page()
+        self.network_bytes = 0
+        self.blocked_requests = 0
+        await self._meter_network(self.page)
+        self.browser_context.on("close", lambda _: self._on_browser_failure("browser closed"))
+        self.page.on("crash", lambda _: self._on_browser_failure("page crashed"))
         self.is_running = True
+        if self.recover_lock is None:
+            self.recover_lock = asyncio.Lock()
+        if self.health_task is None:
+            self.health_task = asyncio.create_task(self._health_loop())
+
+    def _prune_profile(self):
+        freed = 0
+        for rel_path in PRUNED_PROFILE_DIRS:
+            path = os.path.join(USER_DATA_DIR, rel_path)
+            if not os.path.isdir(path):
+                continue
+            for dirpath, _, filenames in os.walk(path):
+                for name in filenames:
+                    try:
+                        freed += os.path.getsize(os.path.join(dirpath, name))
+                    except OSError:
+                        pass
+            shutil.rmtree(path, ignore_errors=True)
+        if freed:
+            print(f"[SCRAPER] Pruned {freed / 1e6:.1f} MB of browser caches from the profile.")
+
+    async def _meter_network(self, page):
+        """Count bytes received and sent by the page, HTTP responses and websocket frames, via CDP.
+        In lean mode the same session pauses BLOCKED_RESOURCE_TYPES requests to abort them."""
+        def on_response(event):
+            self.network_bytes += int(event.get("encodedDataLength", 0))
+
+        def on_frame(event):
+            frame = event["response"]
+            size = len(frame.get("payloadData", ""))
+            # Binary frames (Telegram's MTProto traffic) come base64 encoded
+            self.network_bytes += size * 3 // 4 if frame.get("opcode") == 2 else size
+
+        cdp = await self.browser_context.new_cdp_session(page)
+        cdp.on("Network.loadingFinished", on_response)
+        cdp.on("Network.webSocketFrameReceived", on_frame)
+        cdp.on("Network.webSocketFrameSent", on_frame)
+        await cdp.send("Network.enable")
+
+        if LEAN_MODE:
+            cdp.on("Fetch.requestPaused", lambda event: asyncio.create_task(self._filter_request(cdp, event)))
+            await cdp.send("Fetch.enable", {"patterns": [
+                {"resourceType": resource_type, "requestStage": "Request"} for resource_type in BLOCKED_RESOURCE_TYPES
+            ]})
+
+    async def _filter_request(self, cdp, event):
+        try:
+            if self.telegram_connected:
+                self.blocked_requests += 1
+                await cdp.send("Fetch.failRequest", {"requestId": event["requestId"], "errorReason": "BlockedByClient"})
+            else:
+                await cdp.send("Fetch.continueRequest", {"requestId": event["requestId"]})
+        except Exception:
+            pass  # the page navigated or closed while the request was paused
+
+    def resource_usage(self):
+        """Network bytes and blocked requests since the browser started, and the browser's resident memory."""
+        return {
+            "network_bytes": self.network_bytes,
+            "blocked_requests": self.blocked_requests,
+            "browser_rss": _process_tree_rss(self.driver_pid),
+        }
+
+    def usage_since(self, before):
+        """Network bytes and blocked requests since an earlier resource_usage() snapshot, and the
+        browser's memory now. A browser restart in between resets the counters, only the part
+        since the restart is counted then."""
+        now = self.resource_usage()
+        def since(key):
+            return now[key] - before[key] if now[key] >= before[key] else now[key]
+        return {
+            "network_bytes": since("network_bytes"),
+            "blocked_requests": since("blocked_requests"),
+            "browser_rss": now["browser_rss"],
+        }
 
     async def _restart_browser(self):
         print("[SCRAPER] ⚠️ Browser crashed! Restarting Chromium...")
@@ -201,18 +679,79 @@ class NintendoScraper:
         self.telegram_connected = False
         try:
             if self.browser_context: await self.browser_context.close()
-        except: pass
-        try:
-            if self.playwright: await self.playwright.stop()
-        except: pass
-        self.playwright = None
+        except Exception: pass
         self.browser_context = None
         self.page = None
         await asyncio.sleep(2)
-        await self.start()
+        try:
+            await self.start()
+        except Exception as e:
+            # The driver itself is gone: start it over too
+            print(f"[SCRAPER] Relaunch failed ({e}), restarting the Playwright driver...")
+            try:
+                if self.playwright: await self.playwright.stop()
+            except Exception: pass
+            self.playwright = None
+            await self.start()
         print("[SCRAPER] ✅ Browser restarted successfully.")
 
+    async def _browser_alive(self):
+        if not self.is_running or self.page is None or self.page.is_closed():
+            return False
+        try:
+            await asyncio.wait_for(self.page.evaluate("1"), HEALTH_CHECK_TIMEOUT)
+            return True
+        except Exception:
+            return False
+
+    def _on_browser_failure(self, reason):
+        # Playwright event handler on the scraper loop: recover now rather than at the next scrape
+        if self.is_running:
+            print(f"[SCRAPER] ⚠️ {reason}, recovering...")
+            asyncio.create_task(self._recover_browser())
+
+    async def _recover_browser(self):
+        """Bring back a usable page: a new tab in the running browser when only the page died,
+        a Chromium relaunch otherwise. The Telegram session lives in the profile either way."""
+        async with self.recover_lock:
+            if not self.is_running or await self._browser_alive():
+                return
+            try:
+                page = await self.browser_context.new_page()
+            except Exception:
+                await self._restart_browser()
+                return
+            old_page, self.page = self.page, page
+            try:
+                await old_page.close()
+            except Exception:
+                pass
+            await self._meter_network(page)
+            page.on("crash", lambda _: self._on_browser_failure("page crashed"))
+            # The new tab is blank: reopen Telegram so the next scrape doesn't trust a stale login
+            self.telegram_connected = False
+            try:
+                await page.goto("https://web.telegram.org/a/")
+                await page.wait_for_selector(".chat-list", timeout=15000)
+                self.telegram_connected = True
+            except Exception:
+                pass  # ensure_telegram_login retries and captures the QR if the session is gone
+            print("[SCRAPER] ✅ Replaced the crashed page, browser kept running.")
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(HEALTH_CHECK_INTERVAL)
+            if self.is_running and not await self._browser_alive():
+                try:
+                    await self._recover_browser()
+                except Exception as e:
+                    print(f"[SCRAPER] Browser recovery failed: {e}")
+
     async def ensure_telegram_login(self):
+        # A dead page or browser is recovered first, a cached login alone is not enough
+        if self.is_running and not await self._browser_alive():
+            await self._recover_browser()
+
         if hasattr(self, 'telegram_connected') and self.telegram_connected:
             return True
 
@@ -228,11 +767,11 @@ class NintendoScraper:
                 await self.page.wait_for_selector(".chat-list", timeout=5000)
                 if os.path.exists(qr_path):
                     try: os.remove(qr_path)
-                    except: pass
+                    except Exception: pass
                 print("[LOGIN] Telegram conectado exitosamente.")
                 self.telegram_connected = True
                 return True
-            except:
+            except Exception:
                 pass
             
             print("[LOGIN] Sesión no detectada. Generando captura del QR...")
@@ -252,192 +791,290 @@ class NintendoScraper:
         if not is_logged_in:
             try:
                 await self.page.wait_for_selector(".chat-list", timeout=300000)
-            except:
+            except Exception:
                 raise Exception("Login Timeout")
 
-        chat = self.page.get_by_text(SOURCE_CHAT, exact=False).first
-        await chat.click(force=True)
-        await asyncio.sleep(2)
-        await self.page.bring_to_front()
-        
+        # Warm page: still on the channel from the previous run, skip re-opening it
+        if not await self._chat_is_warm():
+            chat = self.page.get_by_text(SOURCE_CHAT, exact=False).first
+            await chat.click(force=True)
+            await asyncio.sleep(2)
+            await self.page.bring_to_front()
+
+        # Either way the message list needs focus, ScrollScheduler scrolls it with the Home key
+        await self._focus_message_list()
+
+    async def _focus_message_list(self):
         try:
             chat_area = self.page.locator('.messages-container, .MessageList, .chat-content, .bubbles').first
             await chat_area.click(force=True)
             await asyncio.sleep(0.3)
-        except:
+        except Exception:
             await self.page.mouse.click(500, 400)
 
+    async def _chat_is_warm(self):
+        """True when the page shows SOURCE_CHAT at its newest messages, jumping down to them if needed."""
+        try:
+            state = await self.page.evaluate(CHAT_STATE_JS, SOURCE_CHAT)
+            if state is None:
+                return False
+            if not state['atBottom']:
+                await self.page.evaluate(SCROLL_TO_LATEST_JS)
+                await self.page.wait_for_function(CHAT_AT_LATEST_JS, arg=SOURCE_CHAT, polling=100, timeout=3000)
+            return True
+        except Exception:
+            return False
+
+    def _report_progress(self, **counters):
+        if self.on_progress:
+            self.on_progress(counters)
+
+    def _pipeline_progress(self, pipeline):
+        self._report_progress(
+            scrolls=max(pipeline.batches - 1, 0),
+            max_scrolls=pipeline.max_scrolls if pipeline.max_scrolls != float('inf') else None,
+            messages=pipeline.scanned,
+            packs_parsed=pipeline.packs_found,
+            packs_saved=pipeline.saved,
+        )
+
+    def get_high_water_mark(self):
+        return int(self.db.get_scrape_state(HIGH_WATER_KEY, 0) or 0)
+
+    def _advance_high_water_mark(self, newest_msg_id, pipeline=None):
+        """Move the mark forward to newest_msg_id (never back). Call only after the packs are saved.
+
+        With a pipeline, the mark only moves when its scan reached back to the
+        current mark: the mark means every message up to it was processed.
+        """
+        mark = self.get_high_water_mark()
+        if pipeline is not None and not pipeline.covers(mark):
+            print(f"[SCRAPE] Scan stopped at message {pipeline.oldest_msg_id}, above the high-water mark {mark}. "
+                  f"Mark left unchanged.")
+            return mark
+        if newest_msg_id > mark:
+            self.db.set_scrape_state(HIGH_WATER_KEY, str(newest_msg_id))
+            return newest_msg_id
+        return mark
+
     # --- MODE 1: Scrape Today Only ---
     async def scrape_today(self, max_scrolls=7):
         """Scan the last ~100 messages. The DB layer handles deduplication:
         packs already in the catalog are skipped, only truly new ones are inserted."""
         print("[SCRAPE] Starting 'Escanear Hoy' mode (last ~100 messages)...")
-        await self._open_chat()
-        
-        all_texts = set()
-        packs = []
+        await self.source.open()
         
-        for scroll in range(max_scrolls):
-            elements = await self.page.locator(".message, .Message, .bubble").all()
-            for el in elements:
-                try:
-                    text_el = el.locator("div.text-content, .text-content, .message-text").first
-                    text_content = await text_el.inner_text(timeout=500)
-                    if text_content and text_content not in all_texts:
-                        msg_id_str = await el.get_attribute("data-message-id") or await el.get_attribute("data-mid")
-                        tg_msg_id = int(msg_id_str) if msg_id_str else 0
-                        
-                        all_texts.add(text_content)
-                        pack = GenericPack(text_content, tg_msg_id)
-                        if pack.is_valid:
-                            if any(p.content_hash == pack.content_hash for p in packs):
-                                continue
-                            packs.append(pack)
-                except: continue
-                
-            await self.page.keyboard.press("Home")
-            await asyncio.sleep(1)
-            print(f"[SCRAPE] Scroll {scroll+1}/{max_scrolls}, found {len(packs)} valid packs so far")
-            
-        packs.reverse()  # Newest first
-        added = self.db.save_packs([p.to_dict() for p in packs], is_scrape_today=True)
-        print(f"[SCRAPE] Finished. Scanned {len(packs)} packs total, {added} truly new packs added.")
-        return added
+        pipeline = ScrapePipeline(self.db, self.source, is_scrape_today=True,
+                                  executor=self.parse_executor, verbose=True, progress=self._pipeline_progress)
+        await pipeline.run(max_scrolls)
+        self._advance_high_water_mark(pipeline.newest_msg_id, pipeline)
+        print(f"[SCRAPE] Finished ({pipeline.summary()}). Scanned {pipeline.packs_found} packs total, {pipeline.added} truly new packs added.")
+        return pipeline.added
 
     # --- MODE 2: Full Scrape ---
     async def scrape_full(self, message_count=1000):
         print(f"[SCRAPE] Full Scrape mode: {message_count} messages...")
-        await self._open_chat()
-        
-        all_texts = set()
-        packs = []
-        max_scrolls = max(50, message_count // 15)
+        await self.source.open()
         
-        for _ in range(max_scrolls):
-            if len(all_texts) >= message_count: break
-            
-            elements = await self.page.locator(".message, .Message, .bubble").all()
-            for el in elements:
-                try:
-                    text_el = el.locator("div.text-content, .text-content, .message-text").first
-                    text_content = await text_el.inner_text(timeout=500)
-                    if text_content and text_content not in all_texts:
-                        msg_id_str = await el.get_attribute("data-message-id") or await el.get_attribute("data-mid")
-                        tg_msg_id = int(msg_id_str) if msg_id_str else 0
-                        
-                        all_texts.add(text_content)
-                        pack = GenericPack(text_content, tg_msg_id)
-                        if pack.is_valid:
-                            if any(p.content_hash == pack.content_hash for p in packs):
-                                continue
-                            packs.append(pack)
-                except: continue
-                
-            await self.page.keyboard.press("Home")
-            await asyncio.sleep(0.5)
-            
-        packs.reverse()
         # In a full scrape, we do NOT flag packs as "is_new". We just build the catalog.
-        self.db.save_packs([p.to_dict() for p in packs], is_scrape_today=False)
-        print(f"[SCRAPE] Full Scrape Done. Guardados {len(packs)} packs en la base de datos.")
-        return len(packs)
+        pipeline = ScrapePipeline(self.db, self.source, is_scrape_today=False,
+                                  executor=self.parse_executor, message_limit=message_count,
+                                  progress=self._pipeline_progress)
+        await pipeline.run(max_scrolls=max(50, message_count // 15))
+        self._advance_high_water_mark(pipeline.newest_msg_id, pipeline)
+        print(f"[SCRAPE] Full Scrape Done ({pipeline.summary()}). Guardados {pipeline.packs_found} packs en la base de datos.")
+        return pipeline.packs_found
+
+    # --- MODE 2b: Incremental Scrape ---
+    async def scrape_incremental(self, max_scrolls=50):
+        """Scan only the messages posted after the high-water mark.
+
+        Scrolls back until a message at or below the mark is rendered, so the cost
+        is proportional to the new posts. New packs are saved like in scrape_today
+        (is_new=1), then the mark moves to the newest message seen. Without a mark
+        yet, this is a scrape_today-sized scan that sets one.
+        """
+        mark = self.get_high_water_mark()
+        if not mark:
+            max_scrolls = 7
+        print(f"[SCRAPE] Incremental mode, high-water mark: {mark or 'none'}")
+        await self.source.open()
+
+        pipeline = ScrapePipeline(self.db, self.source, is_scrape_today=True,
+                                  executor=self.parse_executor, mark=mark, progress=self._pipeline_progress)
+        await pipeline.run(max_scrolls)
+        new_mark = self._advance_high_water_mark(pipeline.newest_msg_id, pipeline)
+        print(f"[SCRAPE] Incremental done ({pipeline.summary()}). {pipeline.scanned} new messages, {pipeline.skipped} skipped "
+              f"(at or below mark {mark}), {pipeline.added} packs added. Mark is now {new_mark}.")
+        return {
+            "added": pipeline.added,
+            "scanned": pipeline.scanned,
+            "skipped": pipeline.skipped,
+            "batches": pipeline.batches,
+            "reached_mark": pipeline.reached_mark,
+            "caught_up": pipeline.covers(mark),
+            "high_water_mark": new_mark,
+        }
+
+    # --- MODE 2c: Bulk Import ---
+    async def import_dump(self, dump_path, workers=None, chunk_size=2000):
+        """Backfill the catalog from an exported JSONL message dump, no browser involved.
+
+        The dump is replayed newest first through a ScrapePipeline whose parse
+        stage runs in a process pool, `workers` chunks of `chunk_size` messages
+        at a time. Packs are deduplicated like in a scrape (newest message wins
+        by ID and content hash) and bulk-loaded with save_packs like a full
+        scrape (is_new stays 0). The high-water mark moves to the newest message.
+        """
+        workers = workers or os.cpu_count() or 1
+        source = JsonlMessageSource(dump_path, batch_size=chunk_size)
+        started = time.perf_counter()
+        print(f"[IMPORT] Importing {dump_path} with {workers} parser processes...")
+
+        def progress(pipeline):
+            elapsed = time.perf_counter() - started
+            print(f"[IMPORT] {pipeline.scanned:,} messages, {pipeline.packs_found:,} packs "
+                  f"({pipeline.scanned / elapsed:,.0f} msgs/s)")
+            self._pipeline_progress(pipeline)
+
+        # spawn, not fork: this runs next to the web server and browser threads
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            pipeline = ScrapePipeline(self.db, source, is_scrape_today=False, executor=executor,
+                                      parse_ahead=workers, write_batch=10 * chunk_size, progress=progress)
+            await pipeline.run(max_scrolls=float('inf'))
+        new_mark = self._advance_high_water_mark(pipeline.newest_msg_id, pipeline)
+        elapsed = time.perf_counter() - started
+        print(f"[IMPORT] Done ({pipeline.summary()}). {pipeline.packs_found} packs saved, {pipeline.added} new, "
+              f"in {elapsed:.1f}s. Mark is now {new_mark}.")
+        return {
+            "messages": pipeline.scanned,
+            "packs": pipeline.packs_found,
+            "added": pipeline.added,
+            "seconds": round(elapsed, 3),
+            "messages_per_second": round(pipeline.scanned / elapsed) if elapsed else None,
+            "high_water_mark": new_mark,
+        }
 
     # --- MODE 3: Verify Deleted (Sync IDs) ---
     async def verify_deleted(self):
         """Verifies if packs have been deleted from the channel by scanning recent messages.
-        Has multiple safety guards to prevent accidental mass deletion."""
+        Has multiple safety guards to prevent accidental mass deletion, applied by
+        Database.reconcile_deleted. Returns its report."""
         print("[VERIFY] Starting 'Verify Deleted' mode using passive scan...")
-        await self._open_chat()
-        
-        db_ids = self.db.get_all_active_pack_ids()
-        if not db_ids:
-            print("[VERIFY] No active packs in DB. Nothing to verify.")
-            return 0
-            
-        total_db_packs = len(db_ids)
-        print(f"[VERIFY] Auditing {total_db_packs} active packs stored in database...")
+        await self.source.open()
         
         # 1. Scan the last ~500 messages to collect active IDs
         active_ids_in_tg = set()
         all_texts = set()
-        max_scrolls = 35
-        
-        for _ in range(max_scrolls):
-            elements = await self.page.locator(".message, .Message, .bubble").all()
-            for el in elements:
-                try:
-                    text_el = el.locator("div.text-content, .text-content, .message-text").first
-                    text_content = await text_el.inner_text(timeout=500)
-                    if text_content and text_content not in all_texts:
-                        all_texts.add(text_content)
-                        pack = GenericPack(text_content, 0)
-                        if pack.is_valid:
-                            active_ids_in_tg.add(str(pack.id))
-                except: continue
-                
-            await self.page.keyboard.press("Home")
-            await asyncio.sleep(1)
-        
-        # ========== SAFETY GUARD 1 ==========
-        # If we found very few packs in the scan, something is wrong (chat not loaded, etc.)
-        # ABORT to prevent accidental mass deletion.
-        MIN_SCAN_THRESHOLD = 10
-        if len(active_ids_in_tg) < MIN_SCAN_THRESHOLD:
-            print(f"[VERIFY] ⚠️ SAFETY ABORT: Only found {len(active_ids_in_tg)} packs in Telegram scan.")
-            print(f"[VERIFY] This is below the minimum threshold of {MIN_SCAN_THRESHOLD}.")
-            print(f"[VERIFY] The chat likely didn't load properly. NO packs were deleted.")
-            return 0
-            
-        # 2. Find which ones to delete
-        to_delete = []
-        for pack_id in db_ids:
-            str_id = str(pack_id)
-            if str_id.startswith("MANUAL-"):
-                continue # Manually added packs are always safe
-                
-            if str_id not in active_ids_in_tg:
-                to_delete.append(str_id)
         
-        # ========== SAFETY GUARD 2 ==========
-        # If the operation would delete more than 60% of the database, abort.
-        # This prevents catastrophic wipes from scan errors.
-        scraped_pack_count = len([pid for pid in db_ids if not str(pid).startswith("MANUAL-")])
-        if scraped_pack_count > 0 and len(to_delete) > scraped_pack_count * 0.6:
-            print(f"[VERIFY] ⚠️ SAFETY ABORT: Would delete {len(to_delete)} of {scraped_pack_count} scraped packs (>{60}%).")
-            print(f"[VERIFY] This looks like a scan error, not real deletions. NO packs were deleted.")
-            return 0
+        scrolls = -1
+        async for batch in self.source.batches(max_scrolls=35):
+            scrolls += 1
+            for _, text_content in batch:
+                if text_content not in all_texts:
+                    all_texts.add(text_content)
+                    pack = GenericPack(text_content, 0)
+                    if pack.is_valid:
+                        active_ids_in_tg.add(str(pack.id))
+            self._report_progress(scrolls=scrolls, max_scrolls=35, messages=len(all_texts),
+                                  packs_parsed=len(active_ids_in_tg), packs_saved=0)
+        print(f"[VERIFY] Scan finished: {self.source.summary()}.")
         
-        # 3. Actually delete
-        deleted_count = 0
-        for str_id in to_delete:
-            self.db.mark_pack_deleted(str_id, manual=False)
-            deleted_count += 1
-            print(f"[VERIFY] Pack #{str_id} no longer in recent Telegram feed. Removing from DB.")
-                
-        print(f"[VERIFY] Audit Complete. Scanned {len(active_ids_in_tg)} IDs in Telegram. Packs removed: {deleted_count}")
-        return deleted_count
+        # 2. Diff against the catalog and delete in one transaction.
+        # SAFETY GUARD 1: fewer than VERIFY_MIN_SEEN packs found means the chat likely didn't load.
+        # SAFETY GUARD 2: deleting more than VERIFY_MAX_DELETE_RATIO of the scraped packs means a scan error.
+        # Manually added packs (MANUAL-) are always safe.
+        report = await asyncio.to_thread(self.db.reconcile_deleted, active_ids_in_tg,
+                                         min_seen=VERIFY_MIN_SEEN, max_delete_ratio=VERIFY_MAX_DELETE_RATIO)
+        print(f"[VERIFY] Audited {report['audited']} scraped packs stored in database.")
+        if report['aborted'] == 'too_few_seen':
+            print(f"[VERIFY] ⚠️ SAFETY ABORT: Only found {report['scanned']} packs in Telegram scan.")
+            print(f"[VERIFY] This is below the minimum threshold of {VERIFY_MIN_SEEN}.")
+            print("[VERIFY] The chat likely didn't load properly. NO packs were deleted.")
+        elif report['aborted'] == 'too_many_deletions':
+            print(f"[VERIFY] ⚠️ SAFETY ABORT: Would delete {report['candidates']} of {report['audited']} scraped packs (>{VERIFY_MAX_DELETE_RATIO:.0%}).")
+            print("[VERIFY] This looks like a scan error, not real deletions. NO packs were deleted.")
+        else:
+            for str_id in report['deleted_ids']:
+                print(f"[VERIFY] Pack #{str_id} no longer in recent Telegram feed. Removed from DB.")
+            print(f"[VERIFY] Audit Complete. Scanned {report['scanned']} IDs in Telegram. Packs removed: {report['deleted']}")
+        return report
 
     # --- MODE 4: Live Monitor (1 Hour Loop) ---
+    # Seconds without a pushed message before checking the watcher is still attached
+    MONITOR_CHECK_INTERVAL = 60
+
     async def _live_monitor_loop(self):
         print("[MONITOR] Started 60-minute live monitoring on Telegram.")
         self.monitor_active = True
         end_time = time.time() + 3600 # 1 hour
+        watcher = None
         
         try:
+            # 1. Catch up on what was posted before the monitor started, this also opens the chat
+            if not await self._catch_up():
+                return
+
+            # 2. From now on the page pushes new bubbles: no scrolling, no polling while the channel is idle
+            watcher = await self._attach_live_watcher()
+            
             while time.time() < end_time and self.monitor_active:
-                # 1. Do a single silent 'scrape_today' pass under the hood
-                await self.scrape_today(max_scrolls=10)
-                
-                # 2. Look for deletions specifically among the 'is_new' items
-                # (This prevents having to scroll back 50 pages just to check if today's packs died)
-                await asyncio.sleep(60) # Wait 60 seconds before next heartbeat
+                timeout = min(self.MONITOR_CHECK_INTERVAL, end_time - time.time())
+                messages = await watcher.next_batch(timeout=max(timeout, 0))
+                if messages is not None:
+                    await self._save_live_messages(messages)
+                elif watcher.page is not self.page or not await watcher.is_attached():
+                    # The message list or the page was replaced (chat reopened, crash recovery): catch up and watch again
+                    print("[MONITOR] Message list changed, re-attaching watcher.")
+                    if not await self._catch_up():
+                        return
+                    watcher = await self._attach_live_watcher()
                 
         except Exception as e:
             print(f"[MONITOR] Error monitoring: {e}")
         finally:
+            if watcher is not None and watcher.page is self.page:
+                try:
+                    await watcher.detach()
+                except Exception:
+                    pass
             self.monitor_active = False
             print("[MONITOR] Live tracking finished or stopped.")
 
+    # Scroll budgets of the catch-up scans, tried in turn until one reaches the high-water mark
+    CATCH_UP_SCROLLS = (10, 50, float('inf'))
+
+    async def _catch_up(self):
+        """Scan incrementally until every message down to the high-water mark is processed.
+
+        The watcher moves the mark with each pushed message, so attaching it
+        over a gap would skip the gap for good. False if the mark was never reached.
+        """
+        for max_scrolls in self.CATCH_UP_SCROLLS:
+            if not self.monitor_active:
+                return False
+            result = await self.scrape_incremental(max_scrolls=max_scrolls)
+            if result['caught_up']:
+                return True
+        print("[MONITOR] ⚠️ Could not scroll back to the high-water mark, not watching.")
+        return False
+
+    async def _attach_live_watcher(self):
+        # The catch-up scan left the list scrolled up: new bubbles only render at the bottom
+        await self._chat_is_warm()
+        if self.live_watcher is None or self.live_watcher.page is not self.page:
+            self.live_watcher = LiveMessageWatcher(self.page)
+        await self.live_watcher.attach(self.get_high_water_mark())
+        return self.live_watcher
+
+    async def _save_live_messages(self, messages):
+        """Parse and save messages pushed by the live watcher, then move the high-water mark past them."""
+        packs = parse_messages(messages)
+        added = await asyncio.to_thread(self.db.save_packs, packs, True) if packs else 0
+        self._advance_high_water_mark(max(tg_msg_id for tg_msg_id, _ in messages))
+        print(f"[MONITOR] {len(messages)} new messages, {len(packs)} packs, {added} added.")
+        return added
+
     def start_live_monitor(self):
         """Starts the 60 min loop in the asyncio background thread without blocking"""
         if self.monitor_active:
@@ -454,8 +1091,11 @@ class NintendoScraper:
 
     async def close(self):
         self.stop_live_monitor()
+        if self.health_task:
+            self.health_task.cancel()
+            self.health_task = None
+        self.is_running = False  # closing on purpose, not a crash to recover from
         if self.browser_context:
             await self.browser_context.close()
         if self.playwright:
             await self.playwright.stop()
-        self.is_running = False
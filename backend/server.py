@@ -1,14 +1,24 @@
 import threading
 import asyncio
+import base64
 import os
+import gzip
 import json
+import tempfile
 import time
+import uuid
+from collections import OrderedDict
 from functools import wraps
-from flask import Flask, jsonify, request, send_from_directory, session, redirect
+from flask import Flask, Response, jsonify, request, send_from_directory, session, redirect, stream_with_context
 
 from scraper import NintendoScraper
 from database import Database
 
+try:
+    import brotli
+except ImportError:  # Optional: without it the catalog snapshot is served gzip-only
+    brotli = None
+
 # --- App Setup ---
 app = Flask(__name__)
 # Dev secret, use env in prod
@@ -41,10 +51,6 @@ def start_background_loop(loop):
 t = threading.Thread(target=start_background_loop, args=(loop,), daemon=True)
 t.start()
 
-def run_on_scraper_thread(coro):
-    future = asyncio.run_coroutine_threadsafe(coro, loop)
-    return future.result()
-
 
 # --- Auth Guard ---
 def admin_required(f):
@@ -58,6 +64,196 @@ def admin_required(f):
     return decorated_function
 
 
+# --- Response Cache ---
+# Public catalog responses are cached per route + query args and validated
+# against the data version of the tables they read. Every Database write bumps
+# its table's version, so admin edits and scraper saves invalidate them.
+RESPONSE_CACHE_SIZE = 256
+# Total cached body bytes, and the largest body worth keeping: big result pages
+# (500 packs with raw_text) are cheap to re-render next to the memory they pin
+RESPONSE_CACHE_MAX_BYTES = 16 * 1024 * 1024
+RESPONSE_CACHE_MAX_BODY = 512 * 1024
+# Data versions live in the database and survive restarts; the boot ID keeps ETags
+# from a previous deploy, which may render the same data differently, from matching
+BOOT_ID = uuid.uuid4().hex[:8]
+_response_cache = OrderedDict()
+_response_cache_lock = threading.Lock()
+_response_cache_bytes = 0
+
+def cached_response(*tables):
+    """Cache a JSON view's body and answer If-None-Match with 304 while the data is unchanged."""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            # Read the versions before rendering: data written meanwhile only makes the entry stale
+            version = tuple(db.data_version(table) for table in tables)
+            key = (request.path, tuple(sorted((k, v) for k, v in request.args.items(multi=True) if v.strip())))
+
+            with _response_cache_lock:
+                entry = _response_cache.get(key)
+                if entry is not None and entry[0] == version:
+                    _response_cache.move_to_end(key)
+                else:
+                    entry = None
+
+            if entry is None:
+                response = app.make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                etag = f"{BOOT_ID}-{'.'.join(str(v) for v in version)}"
+                entry = (version, response.get_data(), etag)
+                if len(entry[1]) <= RESPONSE_CACHE_MAX_BODY:
+                    _cache_store(key, entry)
+
+            _, body, etag = entry
+            response = Response(body, mimetype='application/json')
+            response.set_etag(etag)
+            # Browsers may keep the body but must revalidate, which costs a 304
+            response.headers['Cache-Control'] = 'no-cache'
+            return response.make_conditional(request)
+        return decorated_function
+    return decorator
+
+def _cache_store(key, entry):
+    """Insert an entry, evicting the least recently used ones past the entry and byte caps."""
+    global _response_cache_bytes
+    with _response_cache_lock:
+        old = _response_cache.pop(key, None)
+        if old is not None:
+            _response_cache_bytes -= len(old[1])
+        _response_cache[key] = entry
+        _response_cache_bytes += len(entry[1])
+        while len(_response_cache) > RESPONSE_CACHE_SIZE or _response_cache_bytes > RESPONSE_CACHE_MAX_BYTES:
+            _, evicted = _response_cache.popitem(last=False)
+            _response_cache_bytes -= len(evicted[1])
+
+
+# --- Catalog Snapshot ---
+# The unfiltered /api/packs response (what ui/packs.html loads first) is
+# materialized once per packs data version as a slim projection, stored raw
+# and pre-compressed, and served as bytes.
+# Both the legacy full download and the first page of ui/packs.html are snapshotted.
+PACKS_PAGE_SIZE = 60
+SNAPSHOT_LIMITS = (PACKS_PAGE_SIZE, 500)
+SNAPSHOT_FIELDS = ('id', 'tg_msg_id', 'games', 'price_usd', 'price_local', 'cover_url',
+                   'is_new', 'is_featured', 'manual_image_url')
+
+class CatalogSnapshot:
+    # Brotli level for the snapshot: level 11 takes most of a second on a 500-pack
+    # body for a few percent smaller output, and the snapshot is rebuilt after every
+    # write batch of a scrape
+    BROTLI_QUALITY = 5
+
+    def __init__(self):
+        # (packs version, {limit -> {Content-Encoding ('identity', 'gzip', 'br') -> body bytes}}),
+        # swapped as one tuple so a reader never pairs a version with another version's bodies
+        self.current = (None, {})
+        self.lock = threading.Lock()
+        self.rebuilding = False
+
+    def get(self):
+        """Return (version, variants). Once built, a stale snapshot keeps being
+        served while a background thread rebuilds it for the new packs version."""
+        current = self.current
+        if current[0] == db.data_version('packs'):
+            return current
+
+        if not current[1]:
+            # First request: nothing to serve yet, build it here
+            with self.lock:
+                if not self.current[1]:
+                    self._rebuild()
+            return self.current
+
+        self.refresh()
+        return current
+
+    def rebuild(self):
+        """Bring the snapshot up to date before returning."""
+        with self.lock:
+            self._rebuild()
+
+    def refresh(self):
+        """Start a background rebuild unless one is already running."""
+        with self.lock:
+            if self.rebuilding:
+                return
+            self.rebuilding = True
+        threading.Thread(target=self._rebuild_in_background, daemon=True).start()
+
+    def _rebuild_in_background(self):
+        try:
+            with self.lock:
+                self._rebuild()
+        finally:
+            self.rebuilding = False
+
+    def _rebuild(self):
+        # Called with self.lock held. Writes during the build leave it one version behind,
+        # the next request starts another rebuild.
+        version = db.data_version('packs')
+        if self.current[0] == version:
+            return
+        variants = {}
+        for limit in SNAPSHOT_LIMITS:
+            packs, next_after = db.get_packs_page(limit=limit)
+            slim = [{field: pack.get(field) for field in SNAPSHOT_FIELDS} for pack in packs]
+            body = app.json.dumps({"results": slim, "next_cursor": encode_cursor(next_after)}).encode('utf-8')
+            variants[limit] = {'identity': body, 'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+            if brotli:
+                variants[limit]['br'] = brotli.compress(body, quality=self.BROTLI_QUALITY)
+        self.current = (version, variants)
+
+    def response(self, limit):
+        version, variants = self.get()
+        variants = variants[limit]
+        encoding = 'identity'
+        for candidate in ('br', 'gzip'):
+            if candidate in variants and request.accept_encodings[candidate]:
+                encoding = candidate
+                break
+
+        response = Response(variants[encoding], mimetype='application/json')
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = 'no-cache'
+        response.set_etag(f"{BOOT_ID}-s{version}-{limit}-{encoding}")
+        return response.make_conditional(request)
+
+catalog_snapshot = CatalogSnapshot()
+
+def _refresh_catalog_snapshot():
+    """Rebuild the snapshot after an admin change or a finished job, before answering:
+    the admin page reloads the catalog right away and must not get the old one.
+    Background rebuilds only cover writes nobody is waiting on (scrape batches)."""
+    catalog_snapshot.rebuild()
+
+
+# --- Pagination ---
+# Cursors are the catalog sort key of the last pack on a page, opaque to clients.
+PACK_FIELDS = frozenset(('id', 'tg_msg_id', 'raw_text', 'games_json', 'games', 'price_usd', 'price_local',
+                         'cover_url', 'is_new', 'is_featured', 'is_manually_deleted', 'manual_image_url',
+                         'created_at', 'content_hash'))
+
+def encode_cursor(after):
+    if after is None:
+        return None
+    raw = json.dumps(list(after), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor, raises ValueError on anything it did not produce."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        msg_id, num_id, pack_id = json.loads(raw)
+    except (TypeError, ValueError) as e:
+        raise ValueError(str(e))
+    if not isinstance(msg_id, int) or not isinstance(num_id, int) or not isinstance(pack_id, str):
+        raise ValueError("cursor")
+    return msg_id, num_id, pack_id
+
+
 # HTML routing is handled automatically by the fallback catch-all route at the bottom
 
 @app.route('/admin/login', methods=['GET', 'POST'])
@@ -86,21 +282,89 @@ def logout():
 
 # --- Public API Routes (Data Fetching) ---
 @app.route('/api/config')
+@cached_response('config')
 def get_config():
     """Return CMS homepage configuration"""
     return jsonify(db.get_all_config())
 
 @app.route('/api/packs')
 def search_packs():
-    query = request.args.get('q', '')
-    exclude = request.args.get('exclude', '')
-    limit = int(request.args.get('limit', 500))
-    price_max = request.args.get('price_max', type=int)
-    dlc_only = request.args.get('dlc_only', 'false').lower() == 'true'
-    featured = request.args.get('featured', 'false').lower() == 'true'
-    
-    results = db.get_packs(query=query, exclude=exclude, price_max=price_max, dlc_only=dlc_only, featured_only=featured, limit=limit)
-    return jsonify({"results": results})
+    args = request.args
+    limit = args.get('limit', '500')
+    is_unfiltered = (
+        not args.get('q', '').strip() and not args.get('exclude', '').strip() and not args.get('price_max')
+        and args.get('dlc_only', 'false').lower() != 'true' and args.get('featured', 'false').lower() != 'true'
+        and not args.get('cursor') and not args.get('fields')
+        and limit.isdigit() and int(limit) in SNAPSHOT_LIMITS
+    )
+    wants_stream = args.get('stream') == '1' or request.accept_mimetypes.best_match(
+        ['application/json', 'application/x-ndjson']) == 'application/x-ndjson'
+    if wants_stream:
+        return _stream_packs()
+    if is_unfiltered:
+        return catalog_snapshot.response(int(limit))
+    return _search_packs_filtered()
+
+def _pack_search_args():
+    """Parse the /api/packs query string into (get_packs kwargs, fields, error response or None)."""
+    search = {
+        'query': request.args.get('q', ''),
+        'exclude': request.args.get('exclude', ''),
+        'limit': request.args.get('limit', 500, type=int),
+        'price_max': request.args.get('price_max', type=int),
+        'dlc_only': request.args.get('dlc_only', 'false').lower() == 'true',
+        'featured_only': request.args.get('featured', 'false').lower() == 'true',
+        'after': None,
+    }
+
+    if search['limit'] is None or search['limit'] < 1:
+        return search, [], (jsonify({"error": "Límite inválido"}), 400)
+
+    if request.args.get('cursor'):
+        try:
+            search['after'] = decode_cursor(request.args['cursor'])
+        except ValueError:
+            return search, [], (jsonify({"error": "Cursor inválido"}), 400)
+
+    fields = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()]
+    unknown = [f for f in fields if f not in PACK_FIELDS]
+    if unknown:
+        return search, fields, (jsonify({"error": f"Campos desconocidos: {', '.join(unknown)}"}), 400)
+    return search, fields, None
+
+@cached_response('packs')
+def _search_packs_filtered():
+    search, fields, error = _pack_search_args()
+    if error:
+        return error
+
+    results, next_after = db.get_packs_page(**search)
+    if fields:
+        results = [{field: pack.get(field) for field in fields} for pack in results]
+    return jsonify({"results": results, "next_cursor": encode_cursor(next_after)})
+
+def _stream_packs():
+    """NDJSON variant of /api/packs: one pack per line, written as the search cursor yields it.
+
+    Nothing is buffered or cached, so large limits cost neither worker memory nor
+    time to first byte. Only packs are written, there is no next_cursor line.
+    """
+    search, fields, error = _pack_search_args()
+    if error:
+        return error
+
+    dumps = app.json.dumps
+    def generate():
+        for pack in db.iter_packs(**search):
+            if fields:
+                pack = {field: pack.get(field) for field in fields}
+            yield dumps(pack) + '\n'
+
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    response.headers['Cache-Control'] = 'no-store'
+    # Let reverse proxies pass lines through as they are written
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 @app.route('/api/packs/suggestions')
 def pack_suggestions():
@@ -108,6 +372,7 @@ def pack_suggestions():
     return jsonify({"suggestions": db.get_game_name_suggestions(q)})
 
 @app.route('/api/juegos')
+@cached_response('juegos')
 def get_juegos():
     return jsonify({"results": db.get_all_juegos()})
 
@@ -179,59 +444,246 @@ def manage_juego(juego_id):
 
 
 # --- Admin API Routes (Scraping & Telegram Packs) ---
-# Scrape tasks run in background to avoid HTTP timeout on Railway
-scrape_status = {"running": False, "result": None, "error": None, "action": None}
-
-def _run_scrape_bg(coro, action_name):
-    """Run a scrape coroutine in the background thread, updating scrape_status."""
-    global scrape_status
-    scrape_status = {"running": True, "result": None, "error": None, "action": action_name}
-    
-    def callback(future):
-        global scrape_status
+# Scrape tasks run in background to avoid HTTP timeout on Railway.
+# Jobs run one at a time on the scraper loop, in submission order, so a verify
+# can be queued behind a full scrape. The running job's progress counters come
+# from scraper.on_progress. Finished jobs are kept in a bounded history. Every
+# change bumps `version`, which /api/admin/scrape/events pushes as SSE.
+class ScrapeJobs:
+    HISTORY_SIZE = 20
+    ACTIVE = ('queued', 'running')
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.jobs = OrderedDict()  # job id -> job dict, oldest first
+        self.pending = {}          # queued job id -> (coroutine factory, discard callback or None)
+        self.current = None        # the running job
+        self.task = None           # its asyncio task, once started on the loop
+        self.cancel_requested = False
+        self.version = 0
+
+    def submit(self, action, factory, discard=None):
+        """Queue factory() to run after the jobs already queued. discard() runs if the job never starts."""
+        with self.cond:
+            job_id = uuid.uuid4().hex[:8]
+            self.jobs[job_id] = {"id": job_id, "action": action, "status": "queued", "progress": {},
+                                 "result": None, "error": None, "usage": None, "created_at": time.time(),
+                                 "started_at": None, "finished_at": None}
+            self.pending[job_id] = (factory, discard)
+            self._changed()
+            self._start_next()
+            return dict(self.jobs[job_id])
+
+    def is_queued(self, action):
+        with self.cond:
+            return any(job['action'] == action and job['status'] == 'queued' for job in self.jobs.values())
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job. False if there is no such active job."""
+        with self.cond:
+            job = self.jobs.get(job_id)
+            if not job or job['status'] not in self.ACTIVE:
+                return False
+            if job['status'] == 'running':
+                # _run records the cancellation once the task has unwound
+                self.cancel_requested = True
+                if self.task:
+                    loop.call_soon_threadsafe(self.task.cancel)
+                return True
+            _, discard = self.pending.pop(job_id)
+            self._finish(job, 'cancelled')
+        if discard:
+            discard()
+        return True
+
+    def snapshot(self):
+        with self.cond:
+            return {"version": self.version, "jobs": [dict(job) for job in self.jobs.values()]}
+
+    def wait(self, version, timeout):
+        """Block until the version differs from `version`, or timeout seconds, then snapshot."""
+        with self.cond:
+            self.cond.wait_for(lambda: self.version != version, timeout)
+            return self.snapshot()
+
+    def status(self):
+        """The legacy scrape_status shape: the running job, else the last finished one."""
+        with self.cond:
+            jobs = list(self.jobs.values())
+            running = any(job['status'] in self.ACTIVE for job in jobs)
+            job = self.current or next(
+                (job for job in reversed(jobs) if job['status'] not in self.ACTIVE), None)
+            if job is None:
+                return {"running": running, "result": None, "error": None, "action": None}
+            return {"running": running, "result": job['result'], "error": job['error'], "action": job['action']}
+
+    def _changed(self):
+        self.version += 1
+        self.cond.notify_all()
+
+    def _start_next(self):
+        # Called with the lock held
+        if self.current is not None:
+            return
+        job = next((job for job in self.jobs.values() if job['status'] == 'queued'), None)
+        if job is None:
+            return
+        factory, _ = self.pending.pop(job['id'])
+        job['status'] = 'running'
+        job['started_at'] = time.time()
+        self.current = job
+        self.cancel_requested = False
+        self._changed()
+        asyncio.run_coroutine_threadsafe(self._run(job, factory), loop)
+
+    async def _run(self, job, factory):
+        scraper.on_progress = lambda counters: self._progress(job, counters)
+        usage_before = scraper.resource_usage()
+        task = asyncio.ensure_future(factory())
+        with self.cond:
+            self.task = task
+            if self.cancel_requested:
+                task.cancel()
         try:
-            result = future.result()
-            scrape_status = {"running": False, "result": result, "error": None, "action": action_name}
+            result = await task
+        except asyncio.CancelledError:
+            status, result, error = 'cancelled', None, None
         except Exception as e:
-            scrape_status = {"running": False, "result": None, "error": str(e), "action": action_name}
-    
-    future = asyncio.run_coroutine_threadsafe(coro, loop)
-    future.add_done_callback(callback)
+            status, result, error = 'error', None, str(e)
+        else:
+            status, error = 'done', None
+        finally:
+            scraper.on_progress = None
+        with self.cond:
+            if self.cancel_requested:
+                # The job may have swallowed the cancellation and finished anyway
+                status, result, error = 'cancelled', None, None
+
+        # Before _finish: the SSE event makes the admin page reload the catalog
+        await asyncio.to_thread(_refresh_catalog_snapshot)
+        with self.cond:
+            self.current = None
+            self.task = None
+            # Bytes moved and blocked by the browser during the job, and its memory at the end
+            job['usage'] = scraper.usage_since(usage_before)
+            self._finish(job, status, result=result, error=error)
+            self._start_next()
+
+    def _progress(self, job, counters):
+        with self.cond:
+            job['progress'] = counters
+            self._changed()
+
+    def _finish(self, job, status, result=None, error=None):
+        # Called with the lock held
+        job.update(status=status, result=result, error=error, finished_at=time.time())
+        finished = [job_id for job_id, other in self.jobs.items() if other['status'] not in self.ACTIVE]
+        for job_id in finished[:-self.HISTORY_SIZE]:
+            del self.jobs[job_id]
+        self._changed()
+
+scrape_jobs = ScrapeJobs()
+
+# An events stream lasts until no job is active; these bound it otherwise
+SSE_KEEPALIVE = 15     # seconds between comments on an idle stream
+SSE_MAX_SECONDS = 600  # the browser's EventSource reconnects after this
+
+def _queue_scrape(action, factory, discard=None):
+    if scrape_jobs.is_queued(action):
+        if discard:
+            discard()
+        return jsonify({"error": "Esa tarea ya está en cola"}), 409
+    job = scrape_jobs.submit(action, factory, discard)
+    return jsonify({"status": "started" if job['status'] == 'running' else 'queued',
+                    "action": action, "job_id": job['id']})
 
 @app.route('/api/admin/scrape/status', methods=['GET'])
 @admin_required
 def api_scrape_status():
-    return jsonify(scrape_status)
+    return jsonify(scrape_jobs.status())
+
+@app.route('/api/admin/scrape/jobs', methods=['GET'])
+@admin_required
+def api_scrape_jobs():
+    return jsonify(scrape_jobs.snapshot())
+
+@app.route('/api/admin/scrape/jobs/<job_id>/cancel', methods=['POST'])
+@admin_required
+def api_cancel_scrape_job(job_id):
+    if not scrape_jobs.cancel(job_id):
+        return jsonify({"error": "La tarea no existe o ya terminó"}), 404
+    return jsonify({"status": "ok"})
+
+@app.route('/api/admin/scrape/events', methods=['GET'])
+@admin_required
+def api_scrape_events():
+    """Server-Sent Events: a 'jobs' event with the job list on connect and after every change,
+    then 'idle' once no job is queued or running, which ends the stream."""
+    def events():
+        version = None
+        deadline = time.monotonic() + SSE_MAX_SECONDS
+        while time.monotonic() < deadline:
+            snapshot = scrape_jobs.wait(version, SSE_KEEPALIVE)
+            if snapshot['version'] == version:
+                yield ": keep-alive\n\n"
+                continue
+            version = snapshot['version']
+            yield f"event: jobs\ndata: {json.dumps(snapshot)}\n\n"
+            if not any(job['status'] in ScrapeJobs.ACTIVE for job in snapshot['jobs']):
+                yield "event: idle\ndata: {}\n\n"
+                return
+
+    response = Response(stream_with_context(events()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-store'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 @app.route('/api/admin/scrape/today', methods=['POST'])
 @admin_required
 def api_scrape_today():
-    if scrape_status.get('running'):
-        return jsonify({"error": "Ya hay un scrape en ejecución"}), 409
-    _run_scrape_bg(scraper.scrape_today(), 'scrape_today')
-    return jsonify({"status": "started", "action": "scrape_today"})
+    return _queue_scrape('scrape_today', scraper.scrape_today)
 
 @app.route('/api/admin/scrape/full', methods=['POST'])
 @admin_required
 def api_scrape_full():
-    if scrape_status.get('running'):
-        return jsonify({"error": "Ya hay un scrape en ejecución"}), 409
-    _run_scrape_bg(scraper.scrape_full(1000), 'scrape_full')
-    return jsonify({"status": "started", "action": "scrape_full"})
+    return _queue_scrape('scrape_full', lambda: scraper.scrape_full(1000))
+
+@app.route('/api/admin/scrape/incremental', methods=['POST'])
+@admin_required
+def api_scrape_incremental():
+    return _queue_scrape('scrape_incremental', scraper.scrape_incremental)
 
 @app.route('/api/admin/scrape/verify', methods=['POST'])
 @admin_required
 def api_verify_deleted():
-    if scrape_status.get('running'):
-        return jsonify({"error": "Ya hay un scrape en ejecución"}), 409
-    _run_scrape_bg(scraper.verify_deleted(), 'verify_deleted')
-    return jsonify({"status": "started", "action": "verify_deleted"})
+    return _queue_scrape('verify_deleted', scraper.verify_deleted)
+
+@app.route('/api/admin/import', methods=['POST'])
+@admin_required
+def api_import_dump():
+    """Bulk-import an exported JSONL message dump (multipart field 'dump')."""
+    file = request.files.get('dump')
+    if not file or not file.filename:
+        return jsonify({"error": "Falta el archivo 'dump'"}), 400
+    # Not under UPLOAD_FOLDER: /uploads/ serves that directory to anyone
+    fd, dump_path = tempfile.mkstemp(prefix='import_', suffix='.jsonl')
+    with os.fdopen(fd, 'wb') as f:
+        file.save(f)
+
+    async def import_and_cleanup():
+        try:
+            return await scraper.import_dump(dump_path)
+        finally:
+            os.remove(dump_path)
+
+    return _queue_scrape('import_dump', import_and_cleanup, discard=lambda: os.remove(dump_path))
 
 @app.route('/api/admin/packs/<pack_id>', methods=['DELETE'])
 @admin_required
 def manual_delete_pack(pack_id):
     """Admin clicked 'Delete' -> Prevent scraper from ever re-adding it"""
     db.mark_pack_deleted(pack_id, manual=True)
+    _refresh_catalog_snapshot()
     return jsonify({"status": "ok"})
 
 @app.route('/api/admin/packs/<pack_id>/toggle_featured', methods=['POST'])
@@ -242,6 +694,7 @@ def toggle_pack_featured(pack_id):
     force = request.json.get('force') if request.is_json else None
     success = db.toggle_pack_featured(pack_id, force=force)
     if success:
+        _refresh_catalog_snapshot()
         return jsonify({"status": "ok"})
     else:
         return jsonify({"error": "No se pudo destacar. El límite de 6 packs ha sido alcanzado o el pack no existe."}), 400
@@ -277,18 +730,101 @@ def create_manual_pack():
     
     try:
         new_id = db.insert_manual_pack(pack_data)
+        _refresh_catalog_snapshot()
         return jsonify({"status": "ok", "id": new_id})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# --- Telegram Status ---
+# The login check (browser launch, navigation, QR screenshot) runs on the scraper
+# loop every PROBE_INTERVAL seconds, started by the first status request.
+# Requests only read the last result, so they never wait on the browser.
+class TelegramStatus:
+    PROBE_INTERVAL = 30  # seconds between checks
+    PROBE_TIMEOUT = 60   # a check taking longer counts as failed
+    MAX_WAIT = 20        # long-poll cap, keeps gunicorn threads free
+    IDLE_TIMEOUT = 300   # probing stops this long after the last status request
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        # version moves when the login state, the browser state or the error changes,
+        # and when the first check completes; not on every check
+        self.state = {"telegram_connected": False, "browser_running": False, "checking": False,
+                      "checked_at": None, "changed_at": None, "error": None, "version": 0}
+        self.started = False
+        self.last_request = 0.0
+
+    def snapshot(self):
+        with self.cond:
+            return dict(self.state)
+
+    def wait(self, version, timeout):
+        """Block until the state version differs from `version`, or timeout seconds."""
+        with self.cond:
+            self.cond.wait_for(lambda: self.state["version"] != version, timeout)
+            return dict(self.state)
+
+    def ensure_started(self):
+        with self.cond:
+            self.last_request = time.time()
+            if self.started:
+                return
+            self.started = True
+        asyncio.run_coroutine_threadsafe(self._probe_loop(), loop)
+
+    def _update(self, **fields):
+        with self.cond:
+            changed = {key: value for key, value in fields.items()
+                       if key not in ("checked_at", "checking") and self.state[key] != value}
+            if fields.get("checked_at") and self.state["checked_at"] is None:
+                changed["checked_at"] = fields["checked_at"]
+            self.state.update(fields)
+            if not changed:
+                return
+            if "telegram_connected" in changed or "browser_running" in changed:
+                self.state["changed_at"] = time.time()
+            self.state["version"] += 1
+            self.cond.notify_all()
+
+    async def _probe_loop(self):
+        while True:
+            await self.probe()
+            await asyncio.sleep(self.PROBE_INTERVAL)
+            with self.cond:
+                # Nobody is looking: stop until the next status request starts it again
+                if time.time() - self.last_request > self.IDLE_TIMEOUT:
+                    self.started = False
+                    return
+
+    async def probe(self):
+        if not scraper.is_running:
+            # Checking is no reason to launch Chromium, the next scrape does
+            self._update(telegram_connected=False, browser_running=False, checking=False,
+                         error=None, checked_at=time.time())
+            return
+        self._update(checking=True)
+        try:
+            connected = bool(await asyncio.wait_for(scraper.ensure_telegram_login(), self.PROBE_TIMEOUT))
+            error = None
+        except Exception as e:
+            connected, error = False, str(e) or type(e).__name__
+        page = scraper.page
+        self._update(telegram_connected=connected,
+                     browser_running=bool(scraper.is_running and page is not None and not page.is_closed()),
+                     checking=False, error=error, checked_at=time.time())
+
+telegram_health = TelegramStatus()
+
 @app.route('/api/admin/telegram/status')
+@admin_required
 def telegram_status():
-    """Check if headless browser QR needs scanning"""
-    try:
-        logged_in = run_on_scraper_thread(scraper.ensure_telegram_login())
-        return jsonify({"telegram_connected": logged_in})
-    except:
-        return jsonify({"telegram_connected": False})
+    """Last known login state, instantly. ?wait=<version> long-polls until it changes."""
+    telegram_health.ensure_started()
+    wait = request.args.get('wait', type=int)
+    if wait is None:
+        return jsonify(telegram_health.snapshot())
+    timeout = min(request.args.get('timeout', TelegramStatus.MAX_WAIT, type=float), TelegramStatus.MAX_WAIT)
+    return jsonify(telegram_health.wait(wait, max(timeout, 0)))
 
 # --- Hot Titles API ---
 
@@ -316,6 +852,7 @@ def api_admin_delete_hot_title(id):
     return jsonify({"status": "ok"})
 
 @app.route('/api/public/hot_titles', methods=['GET'])
+@cached_response('hot_titles')
 def api_public_hot_titles():
     # Public endpoint so index.html can know which titles get the fire emoji
     return jsonify([t['titulo'] for t in db.get_hot_titles()])
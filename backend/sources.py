@@ -0,0 +1,351 @@
+"""Message sources for the scraper.
+
+A source hands the scrape modes the channel's messages in batches of
+(tg_msg_id, text), newest batch first, the way scrolling up the chat does.
+tg_msg_id is 0 when the message has no ID.
+
+- PlaywrightMessageSource: the live channel in web.telegram.org.
+- JsonlMessageSource: a replay of a dump file, one {"tg_msg_id", "text"} JSON
+  object per line, for benchmarks and offline runs.
+
+LiveMessageWatcher is the push counterpart for the live monitor: it hands over
+messages as they are posted instead of scanning.
+"""
+import asyncio
+import json
+import time
+from array import array
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+
+# Every rendered message bubble not returned since the last reset, as
+# [{msg_id, text}], in one round trip. IDs already returned are remembered in
+# the page and skipped before their text is read.
+COLLECT_MESSAGES_JS = """
+(reset) => {
+    if (reset || !window.__nzSeenMsgIds) window.__nzSeenMsgIds = new Set();
+    const seen = window.__nzSeenMsgIds;
+    const messages = [];
+    for (const el of document.querySelectorAll('.message, .Message, .bubble')) {
+        const msgId = el.getAttribute('data-message-id') || el.getAttribute('data-mid');
+        if (msgId && seen.has(msgId)) continue;
+        const textEl = el.querySelector('div.text-content, .text-content, .message-text');
+        const text = textEl ? textEl.innerText : '';
+        if (!text) continue;
+        if (msgId) seen.add(msgId);
+        messages.push({msg_id: msgId, text: text});
+    }
+    return messages;
+}
+"""
+
+# Snapshot of the rendered history: how many bubbles and the ID of the oldest one
+HISTORY_SIGNAL_JS = """
+() => {
+    const els = document.querySelectorAll('.message, .Message, .bubble');
+    const first = els.length ? (els[0].getAttribute('data-message-id') || els[0].getAttribute('data-mid') || '') : '';
+    return {count: els.length, first: first};
+}
+"""
+
+# True once older messages rendered since `before` (more bubbles, or a new oldest one
+# when Telegram recycles the list)
+HISTORY_GREW_JS = """
+(before) => {
+    const els = document.querySelectorAll('.message, .Message, .bubble');
+    const first = els.length ? (els[0].getAttribute('data-message-id') || els[0].getAttribute('data-mid') || '') : '';
+    return els.length !== before.count || first !== before.first;
+}
+"""
+
+# Watches the open chat for bubbles newer than `floor` and reports them through
+# the __nzOnMessages binding as [{msg_id, text}]. Bubbles already rendered above
+# the floor are reported right away. Additions are collected for `interval` ms so
+# a burst of posts is one call; a bubble whose text has not rendered yet is
+# retried a few times. Replaces any previous watcher. Idle cost: none, the
+# observer only runs when the message list changes.
+WATCH_MESSAGES_JS = """
+([floor, interval]) => {
+    if (window.__nzLiveWatch) window.__nzLiveWatch.disconnect();
+    const SELECTOR = '.message, .Message, .bubble';
+    const root = document.querySelector('.bubbles, .MessageList, .messages-container, .chat-content') || document.body;
+    const reported = new Set();
+    let pending = new Map();  // bubble -> tries
+    let timer = null;
+
+    const flush = () => {
+        timer = null;
+        const messages = [];
+        const retry = new Map();
+        for (const [el, tries] of pending) {
+            const msgId = el.getAttribute('data-message-id') || el.getAttribute('data-mid');
+            if (!msgId || !(Number(msgId) > floor) || reported.has(msgId)) continue;
+            const textEl = el.querySelector('div.text-content, .text-content, .message-text');
+            const text = textEl ? textEl.innerText : '';
+            if (text) {
+                reported.add(msgId);
+                messages.push({msg_id: msgId, text: text});
+            } else if (tries < 5) {
+                retry.set(el, tries + 1);
+            }
+        }
+        pending = retry;
+        if (pending.size) timer = setTimeout(flush, interval);
+        if (messages.length) window.__nzOnMessages(messages);
+    };
+    const schedule = () => {
+        if (pending.size && !timer) timer = setTimeout(flush, interval);
+    };
+
+    const observer = new MutationObserver((records) => {
+        for (const record of records) {
+            for (const node of record.addedNodes) {
+                const el = node.nodeType === 1 ? node : node.parentElement;
+                if (!el) continue;
+                const bubble = el.closest(SELECTOR);
+                if (bubble) pending.set(bubble, 0);
+                for (const inner of el.querySelectorAll(SELECTOR)) pending.set(inner, 0);
+            }
+        }
+        schedule();
+    });
+    observer.observe(root, {childList: true, subtree: true});
+    window.__nzLiveWatch = {
+        root: root,
+        disconnect: () => { observer.disconnect(); clearTimeout(timer); },
+    };
+
+    for (const el of root.querySelectorAll(SELECTOR)) pending.set(el, 0);
+    schedule();
+}
+"""
+
+# True while the watcher's message list is still in the document
+LIVE_WATCH_ATTACHED_JS = "() => !!window.__nzLiveWatch && window.__nzLiveWatch.root.isConnected"
+
+LIVE_WATCH_DETACH_JS = """
+() => {
+    if (window.__nzLiveWatch) window.__nzLiveWatch.disconnect();
+    window.__nzLiveWatch = null;
+}
+"""
+
+
+class ScrollScheduler:
+    """Scrolls the open chat towards older messages and waits for them to render.
+
+    Instead of a fixed sleep after each Home press, it waits on the DOM (via
+    HISTORY_GREW_JS, re-checked on every mutation) with a timeout derived from
+    how long recent loads took. A scroll that loads nothing doubles the timeout
+    and is retried; MAX_STALLS of them in a row means the top of the history.
+    """
+
+    MIN_TIMEOUT = 0.5   # seconds
+    MAX_TIMEOUT = 8.0
+    START_TIMEOUT = 2.0
+    MAX_STALLS = 3
+
+    def __init__(self, page, max_scrolls):
+        self.page = page
+        self.max_scrolls = max_scrolls
+        self.scrolls = 0       # Home presses so far
+        self.stalls = 0        # consecutive presses that loaded nothing
+        self.reached_top = False
+        self.timeout = self.START_TIMEOUT
+        self.latency = None    # smoothed seconds until older messages show up
+        self.waited = 0.0
+
+    async def scroll_older(self):
+        """Load older messages. False when there is nothing left to scroll (budget spent or top reached)."""
+        while self.scrolls < self.max_scrolls:
+            before = await self.page.evaluate(HISTORY_SIGNAL_JS)
+            await self.page.keyboard.press("Home")
+            self.scrolls += 1
+
+            started = time.monotonic()
+            try:
+                await self.page.wait_for_function(HISTORY_GREW_JS, arg=before, polling='mutation',
+                                                  timeout=self.timeout * 1000)
+            except PlaywrightTimeoutError:
+                self.waited += time.monotonic() - started
+                self.stalls += 1
+                if self.stalls >= self.MAX_STALLS:
+                    self.reached_top = True
+                    return False
+                # Telegram may just be slow: give the next press more time
+                self.timeout = min(self.timeout * 2, self.MAX_TIMEOUT)
+                continue
+
+            elapsed = time.monotonic() - started
+            self.waited += elapsed
+            self.stalls = 0
+            self.latency = elapsed if self.latency is None else 0.7 * self.latency + 0.3 * elapsed
+            self.timeout = min(max(self.latency * 3, self.MIN_TIMEOUT), self.MAX_TIMEOUT)
+            return True
+        return False
+
+    def summary(self):
+        top = ", reached top of history" if self.reached_top else ""
+        return f"{self.scrolls} scrolls, {self.waited:.1f}s waiting{top}"
+
+
+class MessageSource:
+    """Interface of a message source.
+
+    open() is awaited once before each scan. batches(max_scrolls) is an async
+    generator of lists of (tg_msg_id, text). Each list holds the messages that
+    became visible at that step, oldest first within the list. Successive lists
+    go further back in history. The first list is what is visible without
+    scrolling, and max_scrolls bounds how many more follow. Consumers may stop
+    iterating at any point.
+    """
+
+    async def open(self):
+        pass
+
+    async def batches(self, max_scrolls):
+        raise NotImplementedError
+
+    def summary(self):
+        """One-line description of the last scan, for logs."""
+        return ""
+
+
+class PlaywrightMessageSource(MessageSource):
+    """Rendered messages of the scraper's open Telegram chat, scrolled with a ScrollScheduler."""
+
+    def __init__(self, scraper):
+        self.scraper = scraper  # NintendoScraper: owns the page and the login
+        self.scroller = None
+        self.usage_before = None
+
+    async def open(self):
+        await self.scraper._open_chat()
+        self.usage_before = self.scraper.resource_usage()
+
+    async def batches(self, max_scrolls):
+        page = self.scraper.page
+        self.scroller = ScrollScheduler(page, max_scrolls)
+        reset = True
+        while True:
+            yield await self._collect(page, reset)
+            reset = False
+            if not await self.scroller.scroll_older():
+                return
+
+    @staticmethod
+    async def _collect(page, reset):
+        messages = []
+        for msg in await page.evaluate(COLLECT_MESSAGES_JS, reset):
+            try:
+                messages.append((int(msg['msg_id']) if msg['msg_id'] else 0, msg['text']))
+            except ValueError:
+                continue
+        return messages
+
+    def summary(self):
+        if not self.scroller:
+            return ""
+        usage = self.scraper.usage_since(self.usage_before or {"network_bytes": 0, "blocked_requests": 0})
+        rss = f", browser RSS {usage['browser_rss'] / 1e6:.0f} MB" if usage['browser_rss'] is not None else ""
+        return (f"{self.scroller.summary()}, {usage['network_bytes'] / 1e6:.1f} MB transferred, "
+                f"{usage['blocked_requests']} requests blocked{rss}")
+
+
+class LiveMessageWatcher:
+    """Messages posted to the open chat, pushed by the page as they render.
+
+    attach() installs WATCH_MESSAGES_JS, a MutationObserver on the message list,
+    which calls back into Python through an exposed binding. Batches then queue
+    up here until next_batch() takes them. Telegram can replace the message list
+    (chat reopened, page reloaded), so callers check is_attached() when idle and
+    attach again. One watcher per page: a binding can only be exposed once.
+    """
+
+    BINDING = '__nzOnMessages'
+    FLUSH_INTERVAL = 250  # ms to let a burst of posts render before reporting it
+
+    def __init__(self, page):
+        self.page = page
+        self.queue = asyncio.Queue()
+        self.received = 0
+        self._bound = False
+
+    def _on_messages(self, source, messages):
+        batch = []
+        for msg in messages:
+            try:
+                batch.append((int(msg['msg_id']), msg['text']))
+            except (TypeError, ValueError):
+                continue
+        if batch:
+            self.received += len(batch)
+            self.queue.put_nowait(batch)
+
+    async def attach(self, floor):
+        """Watch for messages with a tg_msg_id above floor, including ones already rendered."""
+        if not self._bound:
+            await self.page.expose_binding(self.BINDING, self._on_messages)
+            self._bound = True
+        await self.page.evaluate(WATCH_MESSAGES_JS, [floor, self.FLUSH_INTERVAL])
+
+    async def is_attached(self):
+        return await self.page.evaluate(LIVE_WATCH_ATTACHED_JS)
+
+    async def detach(self):
+        await self.page.evaluate(LIVE_WATCH_DETACH_JS)
+
+    async def next_batch(self, timeout):
+        """The next [(tg_msg_id, text)] pushed by the page, or None after timeout seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class JsonlMessageSource(MessageSource):
+    """Replays a JSONL dump as if scrolling up the channel, without a browser.
+
+    The file is expected oldest first (ascending tg_msg_id, like Telegram
+    exports). It is read backwards batch_size lines at a time: one pass indexes
+    the line offsets, and only the current batch is held in memory, so
+    100k-message dumps replay at parse speed.
+    """
+
+    def __init__(self, path, batch_size=100):
+        self.path = path
+        self.batch_size = batch_size
+        self.messages_read = 0
+        self.batch_count = 0
+
+    def _line_offsets(self, f):
+        offsets = array('q')
+        pos = 0
+        for line in f:
+            if line.strip():
+                offsets.append(pos)
+            pos += len(line)
+        return offsets
+
+    async def batches(self, max_scrolls):
+        self.messages_read = 0
+        self.batch_count = 0
+        with open(self.path, 'rb') as f:
+            offsets = self._line_offsets(f)
+            end = len(offsets)
+            while end > 0 and self.batch_count <= max_scrolls:
+                start = max(0, end - self.batch_size)
+                batch = []
+                for pos in offsets[start:end]:
+                    f.seek(pos)
+                    msg = json.loads(f.readline())
+                    if msg.get('text'):
+                        batch.append((int(msg.get('tg_msg_id') or 0), msg['text']))
+                end = start
+                self.batch_count += 1
+                self.messages_read += len(batch)
+                yield batch
+
+    def summary(self):
+        return f"{self.batch_count} batches, {self.messages_read} messages from {self.path}"